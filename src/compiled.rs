@@ -0,0 +1,873 @@
+use std::num::NonZeroUsize;
+use std::thread;
+
+use crate::{FloatId, IdMap, IdSet, Number, TopTwo, Tree, BST};
+
+/// Levels narrower than this are expanded on the calling thread in
+/// [`CompiledTree::par_bfs`]; spawning workers costs more than it saves
+const PAR_BFS_MIN_LEVEL: usize = 1 << 14;
+
+/// A read-only, array-backed snapshot of a [`Tree`]
+///
+/// `Tree` stores one heap node per vertex in a hash map, so every step of a
+/// traversal is a hash lookup followed by a pointer chase. A `CompiledTree`
+/// numbers the nodes reachable from the root in preorder and stores the
+/// structure in flat arrays instead: `parent[i]`, and the children of `i` as
+/// the slice `child_idx[child_offset[i]..child_offset[i + 1]]` (CSR layout).
+/// Traversals then walk contiguous memory and allocate nothing but their
+/// output.
+///
+/// Nodes are addressed by index; the root is index `0`. Because the
+/// numbering is preorder, the subtree of `i` occupies the index range
+/// `i..i + num_nodes(i)` and every child has a larger index than its parent.
+///
+/// The snapshot does not follow later changes to the tree it was compiled
+/// from; compile again after modifying the tree.
+///
+/// # Examples
+///
+/// ```
+/// use jangal::BST;
+///
+/// let mut bst = BST::new();
+/// for x in [2, 1, 3] {
+///     bst.insert(x);
+/// }
+///
+/// let compiled = bst.as_tree().compile();
+/// assert_eq!(compiled.len(), 3);
+/// assert_eq!(compiled.value(0), &2);
+/// assert_eq!(compiled.children(0), &[1, 2]);
+/// assert_eq!(compiled.height(0), 1);
+/// ```
+#[derive(Debug, Clone)]
+pub struct CompiledTree<T> {
+    values: Vec<T>,
+    ids: Vec<Number>,
+    parent: Vec<Option<usize>>,
+    child_offset: Vec<usize>,
+    child_idx: Vec<usize>,
+    subtree_end: Vec<usize>,
+    index: IdMap<usize>,
+}
+
+impl<T: Clone> Tree<T> {
+    /// Compile the tree into a read-only [`CompiledTree`]
+    ///
+    /// Only nodes reachable from the root are included. A node referenced by
+    /// more than one parent is kept under the first parent that reaches it,
+    /// and children missing from the tree are skipped. A tree without a root
+    /// compiles to an empty snapshot.
+    ///
+    /// # Examples
+    ///
+    /// ```
+    /// use jangal::{Tree, Node};
+    ///
+    /// let mut tree = Tree::new();
+    /// let root_id = tree.add_node(Node::new("root")).unwrap();
+    /// let child_id = tree.add_node(Node::new("child")).unwrap();
+    ///
+    /// if let Some(root_node) = tree.get_node_mut(root_id) {
+    ///     root_node.add_child(child_id);
+    /// }
+    /// if let Some(child_node) = tree.get_node_mut(child_id) {
+    ///     child_node.set_parent(root_id);
+    /// }
+    /// tree.set_root(root_id);
+    ///
+    /// let compiled = tree.compile();
+    /// assert_eq!(compiled.len(), 2);
+    /// assert_eq!(compiled.id(1), child_id);
+    /// assert_eq!(compiled.index_of(child_id), Some(1));
+    /// ```
+    pub fn compile(&self) -> CompiledTree<T> {
+        let mut values = Vec::with_capacity(self.nodes.len());
+        let mut ids = Vec::with_capacity(self.nodes.len());
+        let mut parent = Vec::with_capacity(self.nodes.len());
+        let mut index = IdMap::with_capacity_and_hasher(self.nodes.len(), Default::default());
+
+        // Number nodes in preorder, remembering which index reached each one
+        let mut visited = IdSet::with_capacity_and_hasher(self.nodes.len(), Default::default());
+        let mut stack: Vec<(FloatId, Option<usize>)> = self
+            .root_id
+            .map(|root_id| (root_id, None))
+            .into_iter()
+            .collect();
+
+        while let Some((current_id, parent_index)) = stack.pop() {
+            if !visited.insert(current_id) {
+                continue;
+            }
+            let Some(node) = self.nodes.get(&current_id) else {
+                continue;
+            };
+
+            index.insert(current_id, values.len());
+            values.push(node.value.clone());
+            ids.push(node.id);
+            parent.push(parent_index);
+
+            let current_index = values.len() - 1;
+            stack.extend(
+                node.children
+                    .iter()
+                    .rev()
+                    .map(|&child_id| (child_id, Some(current_index))),
+            );
+        }
+
+        // Children of a node were numbered in sibling order, so bucketing the
+        // nodes by parent in index order keeps the original child order
+        let n = values.len();
+        let mut child_offset = vec![0; n + 1];
+        for &p in parent.iter().flatten() {
+            child_offset[p + 1] += 1;
+        }
+        for i in 0..n {
+            child_offset[i + 1] += child_offset[i];
+        }
+
+        let mut child_idx = vec![0; child_offset[n]];
+        let mut next = child_offset[..n].to_vec();
+        for (i, p) in parent.iter().enumerate() {
+            if let &Some(p) = p {
+                child_idx[next[p]] = i;
+                next[p] += 1;
+            }
+        }
+
+        // Children come after their parent, so sizes accumulate in one
+        // backward sweep
+        let mut subtree_end: Vec<usize> = (1..=n).collect();
+        for i in (0..n).rev() {
+            if let Some(p) = parent[i] {
+                subtree_end[p] = subtree_end[p].max(subtree_end[i]);
+            }
+        }
+
+        CompiledTree {
+            values,
+            ids,
+            parent,
+            child_offset,
+            child_idx,
+            subtree_end,
+            index,
+        }
+    }
+}
+
+impl<T> CompiledTree<T> {
+    /// Returns the number of compiled nodes
+    ///
+    /// # Examples
+    ///
+    /// ```
+    /// use jangal::BST;
+    ///
+    /// let bst: BST<i32> = [2, 1, 3].into_iter().collect();
+    /// assert_eq!(bst.as_tree().compile().len(), 3);
+    /// ```
+    pub fn len(&self) -> usize {
+        self.values.len()
+    }
+
+    /// Returns true if no nodes were compiled
+    ///
+    /// # Examples
+    ///
+    /// ```
+    /// use jangal::Tree;
+    ///
+    /// let tree: Tree<i32> = Tree::new();
+    /// assert!(tree.compile().is_empty());
+    /// ```
+    pub fn is_empty(&self) -> bool {
+        self.values.is_empty()
+    }
+
+    /// Returns the value stored at `index`
+    ///
+    /// # Panics
+    ///
+    /// Panics if `index` is out of bounds.
+    pub fn value(&self, index: usize) -> &T {
+        &self.values[index]
+    }
+
+    /// Returns the id the node at `index` has in the source tree
+    ///
+    /// # Panics
+    ///
+    /// Panics if `index` is out of bounds.
+    pub fn id(&self, index: usize) -> Number {
+        self.ids[index]
+    }
+
+    /// Returns the index of the node with the given source tree id
+    ///
+    /// # Examples
+    ///
+    /// ```
+    /// use jangal::BST;
+    ///
+    /// let bst: BST<i32> = [2, 1, 3].into_iter().collect();
+    /// let compiled = bst.as_tree().compile();
+    ///
+    /// let root_id = bst.as_tree().root_id().unwrap();
+    /// assert_eq!(compiled.index_of(root_id), Some(0));
+    /// assert_eq!(compiled.index_of(-1.0), None);
+    /// ```
+    pub fn index_of(&self, id: Number) -> Option<usize> {
+        self.index.get(&FloatId::from(id)).copied()
+    }
+
+    /// Returns the index of the parent of the node at `index`
+    ///
+    /// # Panics
+    ///
+    /// Panics if `index` is out of bounds.
+    pub fn parent(&self, index: usize) -> Option<usize> {
+        self.parent[index]
+    }
+
+    /// Returns the indices of the children of the node at `index`
+    ///
+    /// # Panics
+    ///
+    /// Panics if `index` is out of bounds.
+    pub fn children(&self, index: usize) -> &[usize] {
+        &self.child_idx[self.child_offset[index]..self.child_offset[index + 1]]
+    }
+
+    /// Returns the number of nodes in the subtree rooted at `index`
+    ///
+    /// Runs in constant time; out-of-bounds indices yield 0.
+    ///
+    /// # Examples
+    ///
+    /// ```
+    /// use jangal::BST;
+    ///
+    /// let bst: BST<i32> = (1..=7).collect();
+    /// let compiled = bst.as_tree().compile();
+    /// assert_eq!(compiled.num_nodes(0), 7);
+    /// assert_eq!(compiled.num_nodes(1), 3);
+    /// ```
+    pub fn num_nodes(&self, index: usize) -> usize {
+        self.subtree_end.get(index).map_or(0, |&end| end - index)
+    }
+
+    /// Breadth-first traversal of the subtree rooted at `index`
+    ///
+    /// Returns node indices in traversal order; out-of-bounds indices yield
+    /// an empty vector.
+    ///
+    /// # Examples
+    ///
+    /// ```
+    /// use jangal::BST;
+    ///
+    /// let bst: BST<i32> = (1..=7).collect();
+    /// let compiled = bst.as_tree().compile();
+    ///
+    /// let values: Vec<i32> = compiled.bfs(0).into_iter().map(|i| *compiled.value(i)).collect();
+    /// assert_eq!(values, vec![4, 2, 6, 1, 3, 5, 7]);
+    /// ```
+    pub fn bfs(&self, index: usize) -> Vec<usize> {
+        let mut result = Vec::with_capacity(self.num_nodes(index));
+        if index < self.len() {
+            result.push(index);
+        }
+
+        // The output doubles as the queue
+        let mut head = 0;
+        while let Some(&current) = result.get(head) {
+            result.extend_from_slice(self.children(current));
+            head += 1;
+        }
+
+        result
+    }
+
+    /// Breadth-first traversal that expands wide levels on several threads
+    ///
+    /// Returns the same order as [`bfs`](Self::bfs). The traversal proceeds
+    /// level by level: the current level is split into one contiguous chunk
+    /// per available thread, each worker counts the children of its chunk,
+    /// an exclusive scan over those counts gives every chunk its slot in the
+    /// next level, and the workers then copy the children into their slots
+    /// in parallel. Levels narrower than an internal threshold are expanded
+    /// sequentially, so deep, narrow trees behave like `bfs`.
+    ///
+    /// # Examples
+    ///
+    /// ```
+    /// use jangal::BST;
+    ///
+    /// let bst: BST<i32> = (1..=100).collect();
+    /// let compiled = bst.as_tree().compile();
+    /// assert_eq!(compiled.par_bfs(0), compiled.bfs(0));
+    /// ```
+    pub fn par_bfs(&self, index: usize) -> Vec<usize> {
+        let threads = thread::available_parallelism().map_or(1, NonZeroUsize::get);
+        self.par_bfs_with_threads(index, threads)
+    }
+
+    fn par_bfs_with_threads(&self, index: usize, threads: usize) -> Vec<usize> {
+        let offsets = &self.child_offset[..];
+        let child_idx = &self.child_idx[..];
+
+        let mut result = Vec::with_capacity(self.num_nodes(index));
+        if index < self.len() {
+            result.push(index);
+        }
+
+        // Each level is appended right after the previous one, so the output
+        // doubles as the level arrays
+        let mut level_start = 0;
+        while level_start < result.len() {
+            let level_end = result.len();
+
+            if threads == 1 || level_end - level_start < PAR_BFS_MIN_LEVEL {
+                for i in level_start..level_end {
+                    let current = result[i];
+                    result.extend_from_slice(self.children(current));
+                }
+                level_start = level_end;
+                continue;
+            }
+
+            let chunk_len = (level_end - level_start).div_ceil(threads);
+            let counts: Vec<usize> = thread::scope(|s| {
+                let workers: Vec<_> = result[level_start..level_end]
+                    .chunks(chunk_len)
+                    .map(|chunk| {
+                        s.spawn(move || {
+                            chunk
+                                .iter()
+                                .map(|&i| offsets[i + 1] - offsets[i])
+                                .sum::<usize>()
+                        })
+                    })
+                    .collect();
+                workers
+                    .into_iter()
+                    .map(|worker| worker.join().unwrap())
+                    .collect()
+            });
+
+            result.resize(level_end + counts.iter().sum::<usize>(), 0);
+            let (done, mut next_level) = result.split_at_mut(level_end);
+            thread::scope(|s| {
+                for (chunk, &count) in done[level_start..].chunks(chunk_len).zip(&counts) {
+                    // Handing out consecutive slices is the exclusive scan
+                    let (slot, rest) = next_level.split_at_mut(count);
+                    next_level = rest;
+                    s.spawn(move || {
+                        let mut pos = 0;
+                        for &i in chunk {
+                            let children = &child_idx[offsets[i]..offsets[i + 1]];
+                            slot[pos..pos + children.len()].copy_from_slice(children);
+                            pos += children.len();
+                        }
+                    });
+                }
+            });
+
+            level_start = level_end;
+        }
+
+        result
+    }
+
+    /// Preorder traversal of the subtree rooted at `index`
+    ///
+    /// Nodes are numbered in preorder, so this is the index range of the
+    /// subtree.
+    ///
+    /// # Examples
+    ///
+    /// ```
+    /// use jangal::BST;
+    ///
+    /// let bst: BST<i32> = (1..=3).collect();
+    /// assert_eq!(bst.as_tree().compile().preorder(0), vec![0, 1, 2]);
+    /// ```
+    pub fn preorder(&self, index: usize) -> Vec<usize> {
+        (index..index + self.num_nodes(index)).collect()
+    }
+
+    /// Postorder traversal of the subtree rooted at `index`
+    ///
+    /// # Examples
+    ///
+    /// ```
+    /// use jangal::BST;
+    ///
+    /// let bst: BST<i32> = (1..=3).collect();
+    /// assert_eq!(bst.as_tree().compile().postorder(0), vec![1, 2, 0]);
+    /// ```
+    pub fn postorder(&self, index: usize) -> Vec<usize> {
+        // Visiting the node before its children in reverse sibling order
+        // yields the postorder backwards
+        let mut result = Vec::with_capacity(self.num_nodes(index));
+        let mut stack = Vec::new();
+        if index < self.len() {
+            stack.push(index);
+        }
+
+        while let Some(current) = stack.pop() {
+            result.push(current);
+            stack.extend_from_slice(self.children(current));
+        }
+
+        result.reverse();
+        result
+    }
+
+    /// Returns the height of the subtree rooted at `index`
+    ///
+    /// # Examples
+    ///
+    /// ```
+    /// use jangal::BST;
+    ///
+    /// let bst: BST<i32> = (1..=7).collect();
+    /// let compiled = bst.as_tree().compile();
+    /// assert_eq!(compiled.height(0), 2);
+    /// assert_eq!(compiled.height(1), 1);
+    /// ```
+    pub fn height(&self, index: usize) -> usize {
+        self.subtree_tops(index).first().map_or(0, |top| top.first)
+    }
+
+    /// Returns the number of edges on the longest path within the subtree
+    /// rooted at `index`
+    ///
+    /// # Examples
+    ///
+    /// ```
+    /// use jangal::BST;
+    ///
+    /// let bst: BST<i32> = (1..=7).collect();
+    /// assert_eq!(bst.as_tree().compile().diameter(0), 4);
+    /// ```
+    pub fn diameter(&self, index: usize) -> usize {
+        self.subtree_tops(index)
+            .iter()
+            .map(|top| top.first + top.second)
+            .max()
+            .unwrap_or(0)
+    }
+
+    /// Returns the number of leaves in the subtree rooted at `index`
+    ///
+    /// # Examples
+    ///
+    /// ```
+    /// use jangal::BST;
+    ///
+    /// let bst: BST<i32> = (1..=7).collect();
+    /// assert_eq!(bst.as_tree().compile().num_leaves(0), 4);
+    /// ```
+    pub fn num_leaves(&self, index: usize) -> usize {
+        (index..index + self.num_nodes(index))
+            .filter(|&i| self.child_offset[i] == self.child_offset[i + 1])
+            .count()
+    }
+
+    /// The two tallest child heights (plus one) of every node in the
+    /// subtree rooted at `index`, indexed relative to `index`
+    ///
+    /// `first` is the height of the node and `first + second` the longest
+    /// path through it. Both come out of one bottom-up pass: in reverse
+    /// preorder every node is final before its parent is reached, so it
+    /// can be folded into the parent straight away.
+    fn subtree_tops(&self, index: usize) -> Vec<TopTwo> {
+        let mut tops = vec![TopTwo::default(); self.num_nodes(index)];
+        for i in (index + 1..index + tops.len()).rev() {
+            if let Some(p) = self.parent[i] {
+                let height = tops[i - index].first + 1;
+                tops[p - index].push(height);
+            }
+        }
+        tops
+    }
+}
+
+/// A read-only, array-backed snapshot of a [`BST`]
+///
+/// Like [`CompiledTree`], but keeping the binary structure: node `i` has
+/// value `values[i]` and its left child, right child and parent are stored
+/// as indices in the parallel arrays `left`, `right` and `parent`. Nodes are
+/// numbered breadth-first, so the root is index `0` and the upper levels,
+/// which every search passes through, sit together at the front.
+///
+/// Searches and traversals read three flat arrays instead of hashing node
+/// ids, and the snapshot does not follow later changes to the BST.
+///
+/// # Examples
+///
+/// ```
+/// use jangal::BST;
+///
+/// let bst: BST<i32> = (1..=7).collect();
+/// let frozen = bst.freeze();
+///
+/// assert_eq!(frozen.len(), 7);
+/// assert_eq!(frozen.value(0), &4);
+/// assert_eq!(frozen.left(0).map(|i| *frozen.value(i)), Some(2));
+/// assert_eq!(frozen.search(&5).map(|i| *frozen.value(i)), Some(5));
+/// ```
+#[derive(Debug, Clone)]
+pub struct FrozenBST<T> {
+    values: Vec<T>,
+    left: Vec<Option<usize>>,
+    right: Vec<Option<usize>>,
+    parent: Vec<Option<usize>>,
+}
+
+impl<T: Ord + Clone> BST<T> {
+    /// Freeze the BST into a read-only [`FrozenBST`]
+    ///
+    /// # Examples
+    ///
+    /// ```
+    /// use jangal::BST;
+    ///
+    /// let mut bst = BST::new();
+    /// for x in [5, 3, 8] {
+    ///     bst.insert(x);
+    /// }
+    ///
+    /// let frozen = bst.freeze();
+    /// let values: Vec<i32> = frozen.inorder().into_iter().map(|i| *frozen.value(i)).collect();
+    /// assert_eq!(values, vec![3, 5, 8]);
+    /// ```
+    pub fn freeze(&self) -> FrozenBST<T> {
+        let tree = self.as_tree();
+        let mut frozen = FrozenBST {
+            values: Vec::with_capacity(tree.size()),
+            left: Vec::with_capacity(tree.size()),
+            right: Vec::with_capacity(tree.size()),
+            parent: Vec::with_capacity(tree.size()),
+        };
+
+        // Breadth-first numbering, with each queued child remembering which
+        // slot of which parent index it fills
+        let mut queue: Vec<(Number, Option<(usize, bool)>)> = tree
+            .root_id()
+            .map(|root_id| (root_id, None))
+            .into_iter()
+            .collect();
+        let mut head = 0;
+        while let Some(&(node_id, link)) = queue.get(head) {
+            head += 1;
+            let Some(node) = tree.get_node(node_id) else {
+                continue;
+            };
+
+            let index = frozen.values.len();
+            frozen.values.push(node.value.clone());
+            frozen.left.push(None);
+            frozen.right.push(None);
+            frozen.parent.push(link.map(|(parent, _)| parent));
+            match link {
+                Some((parent, true)) => frozen.left[parent] = Some(index),
+                Some((parent, false)) => frozen.right[parent] = Some(index),
+                None => {}
+            }
+
+            queue.extend(node.left().map(|left_id| (left_id, Some((index, true)))));
+            queue.extend(
+                node.right()
+                    .map(|right_id| (right_id, Some((index, false)))),
+            );
+        }
+
+        frozen
+    }
+}
+
+impl<T> FrozenBST<T> {
+    /// Returns the number of frozen nodes
+    pub fn len(&self) -> usize {
+        self.values.len()
+    }
+
+    /// Returns true if the BST was empty when frozen
+    pub fn is_empty(&self) -> bool {
+        self.values.is_empty()
+    }
+
+    /// Returns the value stored at `index`
+    ///
+    /// # Panics
+    ///
+    /// Panics if `index` is out of bounds.
+    pub fn value(&self, index: usize) -> &T {
+        &self.values[index]
+    }
+
+    /// Returns the index of the left child of the node at `index`
+    ///
+    /// # Panics
+    ///
+    /// Panics if `index` is out of bounds.
+    pub fn left(&self, index: usize) -> Option<usize> {
+        self.left[index]
+    }
+
+    /// Returns the index of the right child of the node at `index`
+    ///
+    /// # Panics
+    ///
+    /// Panics if `index` is out of bounds.
+    pub fn right(&self, index: usize) -> Option<usize> {
+        self.right[index]
+    }
+
+    /// Returns the index of the parent of the node at `index`
+    ///
+    /// # Panics
+    ///
+    /// Panics if `index` is out of bounds.
+    pub fn parent(&self, index: usize) -> Option<usize> {
+        self.parent[index]
+    }
+
+    /// Inorder traversal of the whole tree
+    ///
+    /// Returns node indices in ascending order of their values.
+    ///
+    /// # Examples
+    ///
+    /// ```
+    /// use jangal::BST;
+    ///
+    /// let bst: BST<i32> = (1..=3).collect();
+    /// let frozen = bst.freeze();
+    /// // Breadth-first numbering: 2 is the root, then 1 and 3
+    /// assert_eq!(frozen.inorder(), vec![1, 0, 2]);
+    /// ```
+    pub fn inorder(&self) -> Vec<usize> {
+        let mut result = Vec::with_capacity(self.len());
+        let mut stack = Vec::new();
+        let mut current = (!self.is_empty()).then_some(0);
+
+        loop {
+            while let Some(index) = current {
+                stack.push(index);
+                current = self.left[index];
+            }
+            match stack.pop() {
+                Some(index) => {
+                    result.push(index);
+                    current = self.right[index];
+                }
+                None => break,
+            }
+        }
+
+        result
+    }
+}
+
+impl<T: Ord> FrozenBST<T> {
+    /// Returns the index of the node holding `element`
+    ///
+    /// # Examples
+    ///
+    /// ```
+    /// use jangal::BST;
+    ///
+    /// let bst: BST<i32> = (1..=7).collect();
+    /// let frozen = bst.freeze();
+    /// assert_eq!(frozen.search(&4), Some(0));
+    /// assert_eq!(frozen.search(&8), None);
+    /// ```
+    pub fn search(&self, element: &T) -> Option<usize> {
+        let mut current = (!self.is_empty()).then_some(0);
+        while let Some(index) = current {
+            current = match element.cmp(&self.values[index]) {
+                std::cmp::Ordering::Less => self.left[index],
+                std::cmp::Ordering::Greater => self.right[index],
+                std::cmp::Ordering::Equal => return Some(index),
+            };
+        }
+        None
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+    use crate::Node;
+
+    /// Build a tree from (parent, child) index pairs over `n` nodes, root 0
+    fn build(n: usize, edges: &[(usize, usize)]) -> (Tree<usize>, Vec<Number>) {
+        let mut tree = Tree::new();
+        let ids: Vec<Number> = (0..n)
+            .map(|i| tree.add_node(Node::new(i)).unwrap())
+            .collect();
+        for &(p, c) in edges {
+            tree.get_node_mut(ids[p]).unwrap().add_child(ids[c]);
+            tree.get_node_mut(ids[c]).unwrap().set_parent(ids[p]);
+        }
+        tree.set_root(ids[0]);
+        (tree, ids)
+    }
+
+    #[test]
+    fn test_compiled_matches_tree() {
+        //        0
+        //     /  |  \
+        //    1   2   3
+        //   / \      |
+        //  4   5     6
+        //            |
+        //            7
+        let (tree, ids) = build(8, &[(0, 1), (0, 2), (0, 3), (1, 4), (1, 5), (3, 6), (6, 7)]);
+        let compiled = tree.compile();
+        assert_eq!(compiled.len(), 8);
+
+        let values = |order: Vec<usize>| -> Vec<usize> {
+            order.into_iter().map(|i| *compiled.value(i)).collect()
+        };
+        let tree_values = |nodes: Vec<&Node<usize>>| -> Vec<usize> {
+            nodes.into_iter().map(|node| node.value).collect()
+        };
+
+        for (value, &id) in ids.iter().enumerate() {
+            let index = compiled.index_of(id).unwrap();
+            assert_eq!(*compiled.value(index), value);
+            assert_eq!(compiled.id(index), id);
+            assert_eq!(
+                compiled.parent(index).map(|p| compiled.id(p)),
+                tree.get_node(id).unwrap().parent()
+            );
+
+            assert_eq!(values(compiled.bfs(index)), tree_values(tree.bfs(id)));
+            assert_eq!(
+                values(compiled.preorder(index)),
+                tree_values(tree.preorder(id))
+            );
+            assert_eq!(
+                values(compiled.postorder(index)),
+                tree_values(tree.postorder(id))
+            );
+            assert_eq!(compiled.height(index), tree.height(id));
+            assert_eq!(compiled.diameter(index), tree.diameter(id));
+            assert_eq!(compiled.num_leaves(index), tree.num_leaves(id));
+            assert_eq!(compiled.num_nodes(index), tree.num_nodes(id));
+        }
+
+        assert_eq!(compiled.diameter(0), 5);
+        assert_eq!(compiled.bfs(8), Vec::<usize>::new());
+        assert_eq!(compiled.height(8), 0);
+        assert_eq!(compiled.num_leaves(8), 0);
+    }
+
+    #[test]
+    fn test_compile_skips_unreachable_and_shared_nodes() {
+        // Node 3 is not reachable from the root; node 2 is claimed by both
+        // 0 and 1 and must only be compiled once
+        let (mut tree, ids) = build(4, &[(0, 1), (0, 2), (1, 2)]);
+        tree.get_node_mut(ids[1]).unwrap().add_child(-1.0);
+
+        let compiled = tree.compile();
+        assert_eq!(compiled.len(), 3);
+        assert_eq!(compiled.index_of(ids[3]), None);
+        assert_eq!(compiled.num_nodes(0), 3);
+        assert_eq!(compiled.children(compiled.index_of(ids[1]).unwrap()), &[2]);
+        assert_eq!(compiled.children(0), &[1]);
+
+        assert!(Tree::<i32>::new().compile().is_empty());
+    }
+
+    #[test]
+    fn test_par_bfs_matches_bfs() {
+        // Wide enough that the middle levels are expanded in parallel, with
+        // uneven fan-out so chunk boundaries do not line up with levels
+        let width = PAR_BFS_MIN_LEVEL * 2 + 7;
+        let mut edges: Vec<(usize, usize)> = (1..=width).map(|i| (0, i)).collect();
+        let mut next = width + 1;
+        for i in 1..=width {
+            for _ in 0..i % 3 {
+                edges.push((i, next));
+                next += 1;
+            }
+        }
+        let (tree, _) = build(next, &edges);
+        let compiled = tree.compile();
+
+        assert_eq!(compiled.par_bfs(0), compiled.bfs(0));
+        for threads in [2, 3, 8] {
+            assert_eq!(compiled.par_bfs_with_threads(0, threads), compiled.bfs(0));
+        }
+        assert_eq!(compiled.par_bfs(0).len(), next);
+        assert_eq!(compiled.par_bfs(5), compiled.bfs(5));
+        assert_eq!(compiled.par_bfs(next), Vec::<usize>::new());
+    }
+
+    #[test]
+    fn test_frozen_bst_matches_bst() {
+        let mut bst = BST::new();
+        let mut state = 0x9e37_79b9_u32;
+        for _ in 0..500 {
+            state ^= state << 13;
+            state ^= state >> 17;
+            state ^= state << 5;
+            bst.insert(state % 1000);
+        }
+        bst.delete(&bst.inorder()[10].value.clone());
+
+        let frozen = bst.freeze();
+        assert_eq!(frozen.len(), bst.size());
+
+        let expected: Vec<u32> = bst.inorder().iter().map(|node| node.value).collect();
+        let values: Vec<u32> = frozen
+            .inorder()
+            .into_iter()
+            .map(|i| *frozen.value(i))
+            .collect();
+        assert_eq!(values, expected);
+
+        for i in 0..frozen.len() {
+            for child in [frozen.left(i), frozen.right(i)].into_iter().flatten() {
+                assert!(child > i);
+                assert_eq!(frozen.parent(child), Some(i));
+            }
+        }
+        assert_eq!(frozen.parent(0), None);
+
+        for x in 0..1000 {
+            assert_eq!(
+                frozen.search(&x).map(|i| *frozen.value(i)),
+                bst.search(&x).map(|id| bst.get_node(id).unwrap().value)
+            );
+        }
+
+        let empty: BST<u32> = BST::new();
+        assert!(empty.freeze().is_empty());
+        assert!(empty.freeze().inorder().is_empty());
+        assert_eq!(empty.freeze().search(&1), None);
+    }
+
+    #[test]
+    fn test_compile_deep_tree() {
+        let n = 100_000;
+        let edges: Vec<(usize, usize)> = (1..n).map(|i| (i - 1, i)).collect();
+        let (tree, _) = build(n, &edges);
+        let compiled = tree.compile();
+
+        assert_eq!(compiled.height(0), n - 1);
+        assert_eq!(compiled.diameter(0), n - 1);
+        assert_eq!(compiled.num_leaves(0), 1);
+        assert_eq!(compiled.postorder(0).len(), n);
+        assert_eq!(compiled.bfs(0).len(), n);
+        assert_eq!(compiled.par_bfs(0), compiled.bfs(0));
+    }
+}
@@ -38,9 +38,13 @@
 //! assert!(!child1.is_root());
 //! ```
 
-use std::collections::{HashMap, HashSet, VecDeque};
+use std::cell::RefCell;
+use std::collections::{HashMap, HashSet};
 use std::fmt;
-use std::hash::{Hash, Hasher};
+use std::hash::{BuildHasherDefault, Hash, Hasher};
+use std::ops::{Deref, DerefMut};
+use std::sync::{Mutex, MutexGuard, PoisonError};
+use std::thread::LocalKey;
 
 /// Core trait for any tree-like data structure
 pub trait TreeLike<T> {
@@ -98,7 +102,9 @@ pub trait NodeBasedTree<T>: TreeLike<T> {
     fn postorder(&self, node_id: Number) -> Vec<&Node<T>>;
 }
 
+pub mod compiled;
 pub mod tree;
+pub use compiled::{CompiledTree, FrozenBST};
 pub use tree::{vEB, BST};
 
 #[derive(Debug, Clone, Copy)]
@@ -116,8 +122,16 @@ impl FloatId {
 
 impl Hash for FloatId {
     fn hash<H: Hasher>(&self, state: &mut H) {
-        // Use the bit representation for hashing
-        self.0.to_bits().hash(state);
+        // Hash the bit representation, folding the values `eq` treats as
+        // one id (0.0 and -0.0, and every NaN) onto a single pattern
+        let value = if self.0 == 0.0 {
+            0.0
+        } else if self.0.is_nan() {
+            f64::NAN
+        } else {
+            self.0
+        };
+        value.to_bits().hash(state);
     }
 }
 
@@ -145,8 +159,205 @@ impl From<FloatId> for f64 {
     }
 }
 
+/// Hasher for `FloatId` keys
+///
+/// Every tree operation is a chain of id lookups, and the default SipHash
+/// spends tens of instructions on each to resist deliberately colliding
+/// keys. Ids here are generated by the crate or chosen by the caller, so a
+/// single folded multiply is used instead: the 128-bit product of the id's
+/// bits and an odd constant, with its two halves xored together so that
+/// every bit of the id reaches the bucket index. (Integer-valued ids
+/// differ only in their high bits, which a plain multiply would not mix
+/// down.)
+#[derive(Debug, Clone, Copy, Default)]
+struct IdHasher(u64);
+
+impl IdHasher {
+    const MULTIPLIER: u64 = 0x9e37_79b9_7f4a_7c15;
+}
+
+impl Hasher for IdHasher {
+    fn write(&mut self, bytes: &[u8]) {
+        // Not reached by `FloatId`, which hashes a single u64
+        for &byte in bytes {
+            self.write_u64(u64::from(byte));
+        }
+    }
+
+    fn write_u64(&mut self, value: u64) {
+        let product = u128::from(self.0 ^ value) * u128::from(Self::MULTIPLIER);
+        self.0 = (product as u64) ^ ((product >> 64) as u64);
+    }
+
+    fn finish(&self) -> u64 {
+        self.0
+    }
+}
+
+type IdBuildHasher = BuildHasherDefault<IdHasher>;
+type IdMap<V> = HashMap<FloatId, V, IdBuildHasher>;
+type IdSet = HashSet<FloatId, IdBuildHasher>;
+
 pub type Number = f64;
 
+/// Graph connections of a node
+///
+/// Kept out of line from `Node`: three empty hash sets would otherwise add
+/// 144 bytes and three hasher initialisations to every node, including the
+/// tree and BST nodes that never use them.
+#[derive(Debug, Clone, Default)]
+#[allow(dead_code)]
+struct Adjacency {
+    edges: IdSet,
+    incoming: IdSet,
+    outgoing: IdSet,
+}
+
+/// Child ids of a node, stored inline for up to two children
+///
+/// Binary tree and BST nodes never have more than two children, so keeping
+/// them in the node itself saves those nodes a heap allocation each and
+/// keeps the ids next to the rest of the node. Adding a third child moves
+/// the list to the heap, and past `WIDE_CHILDREN` children it also gets a
+/// hash index so membership checks stay constant time. Dereferences to a
+/// slice in insertion order.
+#[derive(Debug, Clone)]
+enum ChildList {
+    Inline { len: u8, ids: [FloatId; 2] },
+    Heap(Vec<FloatId>),
+    Wide(Box<WideChildren>),
+}
+
+/// Children of a wide node: the ordered list plus a set of the same ids
+#[derive(Debug, Clone)]
+struct WideChildren {
+    ids: Vec<FloatId>,
+    index: IdSet,
+}
+
+/// Number of children at which a node starts indexing them; below it a
+/// linear scan of the ids is as fast as hashing
+const WIDE_CHILDREN: usize = 32;
+
+impl ChildList {
+    const fn new() -> Self {
+        Self::Inline {
+            len: 0,
+            ids: [FloatId(0.0); 2],
+        }
+    }
+
+    fn push(&mut self, id: FloatId) {
+        match self {
+            Self::Inline { len, ids } if usize::from(*len) < ids.len() => {
+                ids[usize::from(*len)] = id;
+                *len += 1;
+            }
+            Self::Inline { ids, .. } => {
+                let mut heap = Vec::with_capacity(2 * ids.len());
+                heap.extend_from_slice(ids);
+                heap.push(id);
+                *self = Self::Heap(heap);
+            }
+            Self::Heap(heap) if heap.len() < WIDE_CHILDREN => heap.push(id),
+            Self::Heap(heap) => {
+                let mut ids = std::mem::take(heap);
+                ids.push(id);
+                let index = ids.iter().copied().collect();
+                *self = Self::Wide(Box::new(WideChildren { ids, index }));
+            }
+            Self::Wide(wide) => {
+                wide.ids.push(id);
+                wide.index.insert(id);
+            }
+        }
+    }
+
+    fn remove(&mut self, index: usize) {
+        match self {
+            Self::Inline { len, ids } => {
+                ids.copy_within(index + 1..usize::from(*len), index);
+                *len -= 1;
+            }
+            Self::Heap(heap) => {
+                heap.remove(index);
+            }
+            Self::Wide(wide) => {
+                let id = wide.ids.remove(index);
+                wide.index.remove(&id);
+            }
+        }
+    }
+
+    /// Whether `id` is one of the children; a hash probe for wide nodes
+    fn contains(&self, id: &FloatId) -> bool {
+        match self {
+            Self::Wide(wide) => wide.index.contains(id),
+            _ => self.iter().any(|child_id| child_id == id),
+        }
+    }
+}
+
+impl Default for ChildList {
+    fn default() -> Self {
+        Self::new()
+    }
+}
+
+impl Deref for ChildList {
+    type Target = [FloatId];
+
+    fn deref(&self) -> &[FloatId] {
+        match self {
+            Self::Inline { len, ids } => &ids[..usize::from(*len)],
+            Self::Heap(heap) => heap,
+            Self::Wide(wide) => &wide.ids,
+        }
+    }
+}
+
+impl<'a> IntoIterator for &'a ChildList {
+    type Item = &'a FloatId;
+    type IntoIter = std::slice::Iter<'a, FloatId>;
+
+    fn into_iter(self) -> Self::IntoIter {
+        self.iter()
+    }
+}
+
+/// An optional node id stored in the 8 bytes of the id itself
+///
+/// Every `f64` bit pattern is a valid id, so `Option<FloatId>` needs a
+/// separate tag and takes 16 bytes. Reserving one NaN payload to mean "no
+/// node" keeps a link at 8 bytes, which saves 24 bytes on each node's
+/// parent, left and right links.
+#[derive(Debug, Clone, Copy, PartialEq, Eq)]
+struct Link(u64);
+
+impl Link {
+    /// A quiet NaN with a payload that no generated id can have
+    const NONE: Self = Self(0x7ff8_6a61_6e67_616c);
+
+    fn to(id: FloatId) -> Self {
+        // `FloatId` treats every NaN as the same id, so storing the
+        // canonical one keeps caller-chosen NaNs clear of `NONE`
+        let id = if id.0.is_nan() { f64::NAN } else { id.0 };
+        Self(id.to_bits())
+    }
+
+    fn get(self) -> Option<FloatId> {
+        (self != Self::NONE).then(|| FloatId(f64::from_bits(self.0)))
+    }
+
+    fn is_none(self) -> bool {
+        self == Self::NONE
+    }
+
+    fn is_some(self) -> bool {
+        !self.is_none()
+    }
+}
+
 /// Generic Node Struct
 ///
 /// This node can be used to build various types of tree structures:
@@ -161,17 +372,16 @@ pub struct Node<T> {
     pub id: Number,
 
     // General tree structure
-    parent: Option<FloatId>,
-    children: HashSet<FloatId>,
+    parent: Link,
+    children: ChildList,
 
-    // Graph structure
-    edges: HashSet<FloatId>,
-    incoming: HashSet<FloatId>,
-    outgoing: HashSet<FloatId>,
+    // Graph structure, boxed and allocated on the first `add_edge` since
+    // most tree nodes never get edges
+    adjacency: Option<Box<Adjacency>>,
 
     // BST-specific structure (only used when building BSTs)
-    left: Option<FloatId>,
-    right: Option<FloatId>,
+    left: Link,
+    right: Link,
 }
 
 impl<T> Node<T> {
@@ -197,13 +407,11 @@ impl<T> Node<T> {
         Self {
             value,
             id: Self::generate_id(),
-            parent: None,
-            children: HashSet::new(),
-            edges: HashSet::new(),
-            incoming: HashSet::new(),
-            outgoing: HashSet::new(),
-            left: None,
-            right: None,
+            parent: Link::NONE,
+            children: ChildList::new(),
+            adjacency: None,
+            left: Link::NONE,
+            right: Link::NONE,
         }
     }
 
@@ -225,13 +433,11 @@ impl<T> Node<T> {
         Self {
             value,
             id,
-            parent: None,
-            children: HashSet::new(),
-            edges: HashSet::new(),
-            incoming: HashSet::new(),
-            outgoing: HashSet::new(),
-            left: None,
-            right: None,
+            parent: Link::NONE,
+            children: ChildList::new(),
+            adjacency: None,
+            left: Link::NONE,
+            right: Link::NONE,
         }
     }
 
@@ -280,15 +486,16 @@ impl<T> Node<T> {
         let directed = directed.unwrap_or(false);
         let bidirectional = bidirectional.unwrap_or(false);
         let other_id = FloatId::from(other_id);
+        let adjacency = self.adjacency.get_or_insert_with(Box::default);
 
         if directed {
-            self.outgoing.insert(other_id);
+            adjacency.outgoing.insert(other_id);
             // Note: The other node's incoming edge would need to be added separately
         } else if bidirectional {
-            self.edges.insert(other_id);
+            adjacency.edges.insert(other_id);
             // Note: The other node's edge would need to be added separately
         } else {
-            self.edges.insert(other_id);
+            adjacency.edges.insert(other_id);
         }
     }
 
@@ -310,7 +517,13 @@ impl<T> Node<T> {
     /// assert!(parent.children().contains(&child.id));
     /// ```
     pub fn add_child(&mut self, child_id: Number) {
-        self.children.insert(FloatId::from(child_id));
+        // Children live in a flat vector, which is cheaper to hold and to
+        // iterate than a hash set (wide nodes index it as well); adding an
+        // existing child is a no-op
+        let child_id = FloatId::from(child_id);
+        if !self.children.contains(&child_id) {
+            self.children.push(child_id);
+        }
     }
 
     /// Remove a child node
@@ -333,7 +546,10 @@ impl<T> Node<T> {
     /// assert_eq!(parent.num_children(), 0);
     /// ```
     pub fn remove_child(&mut self, child_id: Number) {
-        self.children.remove(&FloatId::from(child_id));
+        let child_id = FloatId::from(child_id);
+        if let Some(index) = self.children.iter().position(|id| *id == child_id) {
+            self.children.remove(index);
+        }
     }
 
     /// Set the parent of this node
@@ -354,7 +570,7 @@ impl<T> Node<T> {
     /// assert!(!child.is_root());
     /// ```
     pub fn set_parent(&mut self, parent_id: Number) {
-        self.parent = Some(FloatId::from(parent_id));
+        self.parent = Link::to(FloatId::from(parent_id));
     }
 
     /// Remove parent relationship
@@ -377,7 +593,7 @@ impl<T> Node<T> {
     /// assert_eq!(child.parent(), None);
     /// ```
     pub fn remove_parent(&mut self) {
-        self.parent = None;
+        self.parent = Link::NONE;
     }
 
     /// Get the parent ID
@@ -398,12 +614,13 @@ impl<T> Node<T> {
     /// assert_eq!(child.parent(), Some(parent.id));
     /// ```
     pub fn parent(&self) -> Option<Number> {
-        self.parent.map(|id| id.value())
+        self.parent.get().map(|id| id.value())
     }
 
     /// Get children IDs
     ///
-    /// Returns a vector containing the IDs of all child nodes.
+    /// Returns a vector containing the IDs of all child nodes, in the order
+    /// they were added.
     ///
     /// # Examples
     ///
@@ -426,6 +643,29 @@ impl<T> Node<T> {
         self.children.iter().map(|id| id.value()).collect()
     }
 
+    /// Check if a node is a child of this node
+    ///
+    /// Unlike searching [`children`](Self::children), this does not copy
+    /// the ids, and for nodes with many children it is a hash lookup rather
+    /// than a scan.
+    ///
+    /// # Examples
+    ///
+    /// ```
+    /// use jangal::Node;
+    ///
+    /// let mut parent = Node::new("parent");
+    /// let child = Node::new("child");
+    /// let stranger = Node::new("stranger");
+    ///
+    /// parent.add_child(child.id);
+    /// assert!(parent.has_child(child.id));
+    /// assert!(!parent.has_child(stranger.id));
+    /// ```
+    pub fn has_child(&self, child_id: Number) -> bool {
+        self.children.contains(&FloatId::from(child_id))
+    }
+
     /// Check if this node is a root (no parent)
     ///
     /// # Examples
@@ -498,7 +738,7 @@ impl<T> Node<T> {
     /// assert_eq!(root.left(), Some(left.id));
     /// ```
     pub fn set_left(&mut self, left_id: Number) {
-        self.left = Some(FloatId::from(left_id));
+        self.left = Link::to(FloatId::from(left_id));
     }
 
     /// Set right child (for binary trees)
@@ -517,7 +757,7 @@ impl<T> Node<T> {
     /// assert_eq!(root.right(), Some(right.id));
     /// ```
     pub fn set_right(&mut self, right_id: Number) {
-        self.right = Some(FloatId::from(right_id));
+        self.right = Link::to(FloatId::from(right_id));
     }
 
     /// Clear left child (for binary trees)
@@ -539,7 +779,7 @@ impl<T> Node<T> {
     /// assert_eq!(root.left(), None);
     /// ```
     pub fn clear_left(&mut self) {
-        self.left = None;
+        self.left = Link::NONE;
     }
 
     /// Clear right child (for binary trees)
@@ -561,7 +801,7 @@ impl<T> Node<T> {
     /// assert_eq!(root.right(), None);
     /// ```
     pub fn clear_right(&mut self) {
-        self.right = None;
+        self.right = Link::NONE;
     }
 
     /// Get left child ID
@@ -581,7 +821,7 @@ impl<T> Node<T> {
     /// assert_eq!(root.left(), Some(left.id));
     /// ```
     pub fn left(&self) -> Option<Number> {
-        self.left.map(|id| id.value())
+        self.left.get().map(|id| id.value())
     }
 
     /// Get right child ID
@@ -601,7 +841,7 @@ impl<T> Node<T> {
     /// assert_eq!(root.right(), Some(right.id));
     /// ```
     pub fn right(&self) -> Option<Number> {
-        self.right.map(|id| id.value())
+        self.right.get().map(|id| id.value())
     }
 
     /// Check if this node has a left child
@@ -708,10 +948,10 @@ impl<T> Node<T> {
     /// ```
     pub fn connections(&self) -> Vec<Number> {
         let mut connections = Vec::new();
-        if let Some(left_id) = self.left {
+        if let Some(left_id) = self.left.get() {
             connections.push(left_id.value());
         }
-        if let Some(right_id) = self.right {
+        if let Some(right_id) = self.right.get() {
             connections.push(right_id.value());
         }
         connections.extend(self.children.iter().map(|id| id.value()));
@@ -739,6 +979,237 @@ impl<T: fmt::Display> fmt::Display for Node<T> {
     }
 }
 
+/// Measurements of a subtree, computed together by `Tree::subtree_stats`
+#[derive(Debug, Clone, Copy, Default, PartialEq, Eq)]
+struct SubtreeStats {
+    height: usize,
+    num_nodes: usize,
+    num_leaves: usize,
+    diameter: usize,
+}
+
+impl SubtreeStats {
+    /// Stats of a subtree consisting of a single leaf node
+    fn leaf() -> Self {
+        Self {
+            height: 0,
+            num_nodes: 1,
+            num_leaves: 1,
+            diameter: 0,
+        }
+    }
+}
+
+/// The two largest values seen so far, e.g. the two tallest child heights
+/// that make up the longest path through a node
+#[derive(Debug, Clone, Copy, Default, PartialEq, Eq)]
+struct TopTwo {
+    first: usize,
+    second: usize,
+}
+
+impl TopTwo {
+    fn push(&mut self, value: usize) {
+        // min/max compile to conditional moves, so unsorted input does not
+        // cost a mispredicted branch per value
+        self.second = self.second.max(self.first.min(value));
+        self.first = self.first.max(value);
+    }
+}
+
+/// Visited set for ids that are mostly integers in `0..len`
+///
+/// Such ids are tracked in a bitset, one bit per possible id, so a probe is
+/// a shift and a mask instead of a hash and a table lookup. Any other id
+/// (fractional, negative or too large) goes to a `HashSet`, so the set stays
+/// correct whatever ids the tree actually holds.
+#[derive(Debug)]
+struct IdBitset {
+    bits: Vec<u64>,
+    len: usize,
+    overflow: IdSet,
+}
+
+impl IdBitset {
+    fn new(len: usize) -> Self {
+        Self {
+            bits: vec![0; len.div_ceil(64)],
+            len,
+            overflow: IdSet::default(),
+        }
+    }
+
+    /// Mark `id` as visited; returns true if it was not visited before
+    fn insert(&mut self, id: FloatId) -> bool {
+        let value = id.value();
+        if value >= 0.0 && value < self.len as f64 && value.fract() == 0.0 {
+            let index = value as usize;
+            let mask = 1 << (index % 64);
+            let word = &mut self.bits[index / 64];
+            let fresh = *word & mask == 0;
+            *word |= mask;
+            fresh
+        } else {
+            self.overflow.insert(id)
+        }
+    }
+}
+
+/// Scratch buffer type that traversals borrow from a per-thread pool
+trait Scratch: Default + 'static {
+    /// Largest capacity handed back to the pool
+    const MAX_CAPACITY: usize = MAX_POOLED_CAPACITY;
+
+    fn pool() -> &'static LocalKey<RefCell<Vec<Self>>>;
+    fn clear(&mut self);
+    fn capacity(&self) -> usize;
+}
+
+/// Buffers kept per thread and per buffer type; nested traversals (e.g. a
+/// height query inside `is_balanced`) each take their own
+const MAX_POOLED: usize = 8;
+
+/// Larger buffers are freed rather than pooled, so one traversal of a huge
+/// tree does not pin its memory for the life of the thread
+const MAX_POOLED_CAPACITY: usize = 1 << 16;
+
+/// Clearing a hash set touches every bucket, so a large pooled set would
+/// make each later small traversal pay for the biggest one seen so far
+const MAX_POOLED_SET_CAPACITY: usize = 1 << 10;
+
+thread_local! {
+    static ID_STACKS: RefCell<Vec<Vec<FloatId>>> = const { RefCell::new(Vec::new()) };
+    static MARKED_STACKS: RefCell<Vec<Vec<(FloatId, bool)>>> = const { RefCell::new(Vec::new()) };
+    static VISITED_SETS: RefCell<Vec<IdSet>> = const { RefCell::new(Vec::new()) };
+}
+
+impl Scratch for Vec<FloatId> {
+    fn pool() -> &'static LocalKey<RefCell<Vec<Self>>> {
+        &ID_STACKS
+    }
+    fn clear(&mut self) {
+        Vec::clear(self);
+    }
+    fn capacity(&self) -> usize {
+        Vec::capacity(self)
+    }
+}
+
+impl Scratch for Vec<(FloatId, bool)> {
+    fn pool() -> &'static LocalKey<RefCell<Vec<Self>>> {
+        &MARKED_STACKS
+    }
+    fn clear(&mut self) {
+        Vec::clear(self);
+    }
+    fn capacity(&self) -> usize {
+        Vec::capacity(self)
+    }
+}
+
+impl Scratch for IdSet {
+    const MAX_CAPACITY: usize = MAX_POOLED_SET_CAPACITY;
+
+    fn pool() -> &'static LocalKey<RefCell<Vec<Self>>> {
+        &VISITED_SETS
+    }
+    fn clear(&mut self) {
+        HashSet::clear(self);
+    }
+    fn capacity(&self) -> usize {
+        HashSet::capacity(self)
+    }
+}
+
+/// A work stack or visited set borrowed from the current thread's pool
+///
+/// Every traversal needs scratch space that is thrown away when it
+/// returns. Taking it from a pool and handing it back on drop reuses the
+/// allocation across calls instead of growing a fresh one each time. The
+/// buffer is always empty when taken.
+struct Pooled<S: Scratch>(S);
+
+impl<S: Scratch> Pooled<S> {
+    fn take() -> Self {
+        let buffer = S::pool()
+            .try_with(|pool| pool.borrow_mut().pop())
+            .ok()
+            .flatten();
+        Self(buffer.unwrap_or_default())
+    }
+}
+
+impl<S: Scratch> Deref for Pooled<S> {
+    type Target = S;
+
+    fn deref(&self) -> &S {
+        &self.0
+    }
+}
+
+impl<S: Scratch> DerefMut for Pooled<S> {
+    fn deref_mut(&mut self) -> &mut S {
+        &mut self.0
+    }
+}
+
+impl<S: Scratch> Drop for Pooled<S> {
+    fn drop(&mut self) {
+        if self.0.capacity() > S::MAX_CAPACITY {
+            return;
+        }
+        let mut buffer = std::mem::take(&mut self.0);
+        buffer.clear();
+        // The pool is gone if the thread is shutting down; just free then
+        let _ = S::pool().try_with(|pool| {
+            let mut pool = pool.borrow_mut();
+            if pool.len() < MAX_POOLED {
+                pool.push(buffer);
+            }
+        });
+    }
+}
+
+/// Memoized subtree measurements and depths of the nodes of a `Tree`
+#[derive(Debug, Default, Clone)]
+struct Memo {
+    stats: IdMap<SubtreeStats>,
+    depths: IdMap<usize>,
+}
+
+/// Cache of per-node measurements, shared by the `&self` query methods
+///
+/// Nodes are edited in place through `get_node_mut`, so the tree cannot tell
+/// which relationships changed. Instead, every method that can change the
+/// structure (`add_node`, `get_node_mut`, `remove_node`) drops the whole
+/// cache. A `Mutex` rather than a `RefCell` keeps `Tree` `Sync`.
+#[derive(Debug, Default)]
+struct TreeCache(Mutex<Memo>);
+
+impl TreeCache {
+    fn lock(&self) -> MutexGuard<'_, Memo> {
+        self.0.lock().unwrap_or_else(PoisonError::into_inner)
+    }
+
+    fn invalidate(&mut self) {
+        let memo = self.0.get_mut().unwrap_or_else(PoisonError::into_inner);
+        // Clearing a map touches its whole allocation, so skip empty ones:
+        // BST operations call get_node_mut several times per insert
+        if !memo.stats.is_empty() {
+            memo.stats.clear();
+        }
+        if !memo.depths.is_empty() {
+            memo.depths.clear();
+        }
+    }
+}
+
+impl Clone for TreeCache {
+    fn clone(&self) -> Self {
+        Self(Mutex::new(self.lock().clone()))
+    }
+}
+
 /// A tree structure that manages nodes
 ///
 /// A flexible tree structure that can represent various types of hierarchical data.
@@ -831,8 +1302,9 @@ impl<T: fmt::Display> fmt::Display for Node<T> {
 /// ```
 #[derive(Debug, Clone)]
 pub struct Tree<T> {
-    nodes: HashMap<FloatId, Node<T>>,
+    nodes: IdMap<Node<T>>,
     root_id: Option<FloatId>,
+    cache: TreeCache,
 }
 
 impl<T> Tree<T> {
@@ -850,194 +1322,83 @@ impl<T> Tree<T> {
     /// ```
     pub fn new() -> Self {
         Self {
-            nodes: HashMap::new(),
+            nodes: IdMap::default(),
             root_id: None,
+            cache: TreeCache::default(),
         }
     }
 }
 
+// The trait implementations forward to the inherent methods, so each
+// operation has a single implementation whichever way it is called.
 impl<T> TreeLike<T> for Tree<T> {
     fn size(&self) -> usize {
-        self.nodes.len()
+        Tree::size(self)
     }
 
     fn is_empty(&self) -> bool {
-        self.nodes.is_empty()
+        Tree::is_empty(self)
     }
 
     fn search_by_value(&self, value: &T) -> Option<Number>
     where
         T: PartialEq,
     {
-        for (id, node) in &self.nodes {
-            if node.value == *value {
-                return Some(id.value());
-            }
-        }
-        None
+        Tree::search_by_value(self, value)
     }
 
     fn num_nodes(&self, node_id: Number) -> usize {
-        if let Some(node) = self.nodes.get(&FloatId::from(node_id)) {
-            let mut count = 1; // Count the current node
-            for child_id in node.children() {
-                count += self.num_nodes(child_id);
-            }
-            return count;
-        }
-        0
+        Tree::num_nodes(self, node_id)
     }
 
     fn is_balanced(&self, node_id: Number) -> bool {
-        if let Some(node) = self.nodes.get(&FloatId::from(node_id)) {
-            if node.is_leaf() {
-                return true;
-            }
-
-            let mut heights = Vec::new();
-            for child_id in node.children() {
-                heights.push(self.height(child_id));
-            }
-
-            if heights.is_empty() {
-                return true;
-            }
-
-            let min_height = heights.iter().min().unwrap();
-            let max_height = heights.iter().max().unwrap();
-
-            // Check if the height difference is at most 1
-            if max_height - min_height > 1 {
-                return false;
-            }
-
-            // Recursively check all children
-            for child_id in node.children() {
-                if !self.is_balanced(child_id) {
-                    return false;
-                }
-            }
-
-            return true;
-        }
-        true
+        self.all_subtrees_balanced(node_id)
     }
 }
 
 impl<T> NodeBasedTree<T> for Tree<T> {
     fn root_id(&self) -> Option<Number> {
-        self.root_id.map(|id| id.value())
+        Tree::root_id(self)
     }
 
     fn get_node(&self, id: Number) -> Option<&Node<T>> {
-        self.nodes.get(&FloatId::from(id))
+        Tree::get_node(self, id)
     }
 
     fn get_node_mut(&mut self, id: Number) -> Option<&mut Node<T>> {
-        self.nodes.get_mut(&FloatId::from(id))
+        Tree::get_node_mut(self, id)
     }
 
     fn height(&self, node_id: Number) -> usize {
-        if let Some(node) = self.nodes.get(&FloatId::from(node_id)) {
-            if node.is_leaf() {
-                return 0;
-            }
-            let mut max_height = 0;
-            for child_id in node.children() {
-                let child_height = self.height(child_id);
-                max_height = max_height.max(child_height);
-            }
-            return 1 + max_height;
-        }
-        0
+        Tree::height(self, node_id)
     }
 
     fn depth(&self, node_id: Number) -> usize {
-        let mut current_id = FloatId::from(node_id);
-        let mut depth = 0;
-
-        while let Some(node) = self.nodes.get(&current_id) {
-            if let Some(parent_id) = node.parent() {
-                current_id = FloatId::from(parent_id);
-                depth += 1;
-            } else {
-                break;
-            }
-        }
-
-        depth
+        Tree::depth(self, node_id)
     }
 
     fn num_leaves(&self, node_id: Number) -> usize {
-        if let Some(node) = self.nodes.get(&FloatId::from(node_id)) {
-            if node.is_leaf() {
-                return 1;
-            }
-            let mut count = 0;
-            for child_id in node.children() {
-                count += self.num_leaves(child_id);
-            }
-            return count;
-        }
-        0
+        Tree::num_leaves(self, node_id)
     }
 
     fn get_leaves(&self, node_id: Number) -> Vec<&Node<T>> {
-        if let Some(node) = self.nodes.get(&FloatId::from(node_id)) {
-            if node.is_leaf() {
-                return vec![node];
-            }
-            let mut leaves = Vec::new();
-            for child_id in node.children() {
-                leaves.extend(self.get_leaves(child_id));
-            }
-            return leaves;
-        }
-        Vec::new()
+        Tree::get_leaves(self, node_id)
     }
 
     fn dfs(&self, node_id: Number) -> Vec<&Node<T>> {
-        let mut visited = HashSet::new();
-        let mut result = Vec::new();
-        self.dfs_recursive(FloatId::from(node_id), &mut visited, &mut result);
-        result
+        Tree::dfs(self, node_id)
     }
 
     fn bfs(&self, node_id: Number) -> Vec<&Node<T>> {
-        let mut visited = HashSet::new();
-        let mut queue = VecDeque::new();
-        let mut result = Vec::new();
-
-        let node_id = FloatId::from(node_id);
-        queue.push_back(node_id);
-        visited.insert(node_id);
-
-        while let Some(current_id) = queue.pop_front() {
-            if let Some(node) = self.nodes.get(&current_id) {
-                result.push(node);
-                for child_id in node.children() {
-                    let child_id = FloatId::from(child_id);
-                    if !visited.contains(&child_id) {
-                        visited.insert(child_id);
-                        queue.push_back(child_id);
-                    }
-                }
-            }
-        }
-
-        result
+        Tree::bfs(self, node_id)
     }
 
     fn preorder(&self, node_id: Number) -> Vec<&Node<T>> {
-        let mut result = Vec::new();
-        self.preorder_recursive(FloatId::from(node_id), &mut result);
-        result
+        Tree::preorder(self, node_id)
     }
 
     fn postorder(&self, node_id: Number) -> Vec<&Node<T>> {
-        let mut result = Vec::new();
-        self.postorder_recursive(FloatId::from(node_id), &mut result);
-        result
+        Tree::postorder(self, node_id)
     }
 }
 
@@ -1069,6 +1430,7 @@ impl<T> Tree<T> {
     /// ```
     pub fn add_node(&mut self, node: Node<T>) -> Option<Number> {
         let id = FloatId::from(node.id);
+        self.cache.invalidate();
         self.nodes.insert(id, node);
         if self.root_id.is_none() {
             self.root_id = Some(id);
@@ -1121,6 +1483,7 @@ impl<T> Tree<T> {
     /// }
     /// ```
     pub fn get_node_mut(&mut self, id: Number) -> Option<&mut Node<T>> {
+        self.cache.invalidate();
         self.nodes.get_mut(&FloatId::from(id))
     }
 
@@ -1177,10 +1540,11 @@ impl<T> Tree<T> {
         self.root_id = id;
     }
 
-    /// Remove a node
+    /// Remove a node, returning it if it was in the tree
     #[allow(dead_code)]
-    pub fn remove_node(&mut self, id: Number) {
-        self.nodes.remove(&FloatId::from(id));
+    pub fn remove_node(&mut self, id: Number) -> Option<Node<T>> {
+        self.cache.invalidate();
+        self.nodes.remove(&FloatId::from(id))
     }
 
     /// Get the minimum value in the tree
@@ -1333,18 +1697,7 @@ impl<T> Tree<T> {
     /// assert_eq!(tree.height(grandchild_id), 0);
     /// ```
     pub fn height(&self, node_id: Number) -> usize {
-        if let Some(node) = self.get_node(node_id) {
-            if node.is_leaf() {
-                return 0;
-            }
-            let mut max_height = 0;
-            for child_id in node.children() {
-                let child_height = self.height(child_id);
-                max_height = max_height.max(child_height);
-            }
-            return 1 + max_height;
-        }
-        0
+        self.cached_stats(FloatId::from(node_id)).height
     }
 
     /// Calculate the depth of a node
@@ -1385,25 +1738,45 @@ impl<T> Tree<T> {
     /// assert_eq!(tree.depth(grandchild_id), 2);
     /// ```
     pub fn depth(&self, node_id: Number) -> usize {
-        self.depth_recursive(FloatId::from(node_id), &mut HashSet::new())
-    }
-
-    fn depth_recursive(&self, node_id: FloatId, visited: &mut HashSet<FloatId>) -> usize {
-        if visited.contains(&node_id) {
-            return 0; // Prevent infinite recursion
+        let node_id = FloatId::from(node_id);
+        let mut cache = self.cache.lock();
+        if let Some(&depth) = cache.depths.get(&node_id) {
+            return depth;
         }
 
-        visited.insert(node_id);
-
-        if let Some(node) = self.nodes.get(&node_id) {
-            if node.is_root() {
-                return 0;
+        // Walk up until reaching a root, a node whose depth is already known,
+        // or a parent missing from the tree, then assign depths on the way
+        // back down so every ancestor on the path is cached as well
+        let mut path = Pooled::<Vec<FloatId>>::take();
+        let mut visited = Pooled::<IdSet>::take();
+        let mut current_id = node_id;
+        let base = loop {
+            if let Some(&depth) = cache.depths.get(&current_id) {
+                break depth;
+            }
+            if !visited.insert(current_id) {
+                break 0; // Prevent infinite loops on cyclic parent links
             }
-            if let Some(parent_id) = node.parent() {
-                return 1 + self.depth_recursive(FloatId::from(parent_id), visited);
+            match self.nodes.get(&current_id) {
+                Some(node) => match node.parent.get() {
+                    Some(parent_id) => {
+                        path.push(current_id);
+                        current_id = parent_id;
+                    }
+                    None => {
+                        cache.depths.insert(current_id, 0);
+                        break 0;
+                    }
+                },
+                None => break 0,
             }
+        };
+
+        let len = path.len();
+        for (i, &id) in path.iter().enumerate() {
+            cache.depths.insert(id, base + len - i);
         }
-        0
+        base + len
     }
 
     /// Count the number of leaves in the subtree rooted at the given node
@@ -1450,17 +1823,7 @@ impl<T> Tree<T> {
     /// assert_eq!(tree.num_leaves(child2_id), 1);
     /// ```
     pub fn num_leaves(&self, node_id: Number) -> usize {
-        if let Some(node) = self.get_node(node_id) {
-            if node.is_leaf() {
-                return 1;
-            }
-            let mut count = 0;
-            for child_id in node.children() {
-                count += self.num_leaves(child_id);
-            }
-            return count;
-        }
-        0
+        self.cached_stats(FloatId::from(node_id)).num_leaves
     }
 
     /// Count the total number of nodes in the subtree rooted at the given node
@@ -1501,20 +1864,152 @@ impl<T> Tree<T> {
     /// assert_eq!(tree.num_nodes(child2_id), 1);
     /// ```
     pub fn num_nodes(&self, node_id: Number) -> usize {
-        if let Some(node) = self.get_node(node_id) {
-            let mut count = 1;
-            for child_id in node.children() {
-                count += self.num_nodes(child_id);
+        self.cached_stats(FloatId::from(node_id)).num_nodes
+    }
+
+    /// Calculate the diameter of the subtree rooted at the given node
+    ///
+    /// The diameter is the number of edges on the longest path between any
+    /// two nodes of the subtree. A single node has diameter 0.
+    ///
+    /// # Examples
+    ///
+    /// ```
+    /// use jangal::{Tree, Node};
+    ///
+    /// let mut tree = Tree::new();
+    /// let root = Node::new("root");
+    /// let child1 = Node::new("child1");
+    /// let child2 = Node::new("child2");
+    /// let grandchild = Node::new("grandchild");
+    ///
+    /// let root_id = tree.add_node(root).unwrap();
+    /// let child1_id = tree.add_node(child1).unwrap();
+    /// let child2_id = tree.add_node(child2).unwrap();
+    /// let grandchild_id = tree.add_node(grandchild).unwrap();
+    ///
+    /// // Set up relationships
+    /// if let Some(root_node) = tree.get_node_mut(root_id) {
+    ///     root_node.add_child(child1_id);
+    ///     root_node.add_child(child2_id);
+    /// }
+    /// if let Some(child1_node) = tree.get_node_mut(child1_id) {
+    ///     child1_node.set_parent(root_id);
+    ///     child1_node.add_child(grandchild_id);
+    /// }
+    /// if let Some(child2_node) = tree.get_node_mut(child2_id) {
+    ///     child2_node.set_parent(root_id);
+    /// }
+    /// if let Some(grandchild_node) = tree.get_node_mut(grandchild_id) {
+    ///     grandchild_node.set_parent(child1_id);
+    /// }
+    ///
+    /// tree.set_root(root_id);
+    ///
+    /// // grandchild -> child1 -> root -> child2
+    /// assert_eq!(tree.diameter(root_id), 3);
+    /// assert_eq!(tree.diameter(child1_id), 1);
+    /// assert_eq!(tree.diameter(grandchild_id), 0);
+    /// ```
+    pub fn diameter(&self, node_id: Number) -> usize {
+        self.cached_stats(FloatId::from(node_id)).diameter
+    }
+
+    /// Expected number of nodes reachable from `node_id`, for presizing
+    ///
+    /// A walk from the root normally reaches every node, so its working sets
+    /// are allocated for the whole tree up front instead of being rehashed
+    /// as they grow. Subtree sizes are unknown without walking them first,
+    /// so walks from other nodes start empty.
+    fn traversal_capacity(&self, node_id: FloatId) -> usize {
+        if self.root_id == Some(node_id) {
+            self.nodes.len()
+        } else {
+            0
+        }
+    }
+
+    /// Measurements of the subtree rooted at `node_id`, memoized
+    ///
+    /// A miss measures the whole subtree and keeps the stats of every node
+    /// in it, so later queries anywhere below are lookups too. A missing
+    /// node measures as all zeros.
+    fn cached_stats(&self, node_id: FloatId) -> SubtreeStats {
+        let mut cache = self.cache.lock();
+        if let Some(&stats) = cache.stats.get(&node_id) {
+            return stats;
+        }
+
+        self.subtree_stats(node_id, &mut cache.stats);
+        cache.stats.get(&node_id).copied().unwrap_or_default()
+    }
+
+    /// Compute height, node count, leaf count and diameter of a subtree
+    ///
+    /// All four are derived bottom-up in a single iterative postorder pass,
+    /// so each node is visited once instead of once per measurement (and
+    /// instead of once per ancestor for `diameter`). The stats of every node
+    /// in the subtree are added to `stats`; subtrees whose root already has
+    /// an entry are not walked again. The start node gets no entry if it
+    /// does not exist. Children that are referenced but missing from the
+    /// tree contribute nothing, matching the per-property definitions.
+    fn subtree_stats(&self, node_id: FloatId, stats: &mut IdMap<SubtreeStats>) {
+        let capacity = self.traversal_capacity(node_id);
+        stats.reserve(capacity);
+        let mut visited = Pooled::<IdSet>::take();
+        visited.reserve(capacity);
+        let mut stack = Pooled::<Vec<(FloatId, bool)>>::take();
+        stack.push((node_id, false));
+
+        while let Some((current_id, expanded)) = stack.pop() {
+            let Some(node) = self.nodes.get(&current_id) else {
+                continue;
+            };
+
+            if !expanded {
+                if stats.contains_key(&current_id) {
+                    continue;
+                }
+                // Guard against cycles and shared subtrees being expanded twice
+                if visited.insert(current_id) {
+                    stack.push((current_id, true));
+                    stack.extend(node.children.iter().map(|&child_id| (child_id, false)));
+                }
+                continue;
             }
-            return count;
+
+            if node.is_leaf() {
+                stats.insert(current_id, SubtreeStats::leaf());
+                continue;
+            }
+
+            let mut current = SubtreeStats {
+                num_nodes: 1,
+                ..SubtreeStats::default()
+            };
+            // The longest path through this node joins its two tallest
+            // children, so only the top two heights are needed
+            let mut heights = TopTwo::default();
+            for child_id in &node.children {
+                let child = stats.get(child_id).copied().unwrap_or_default();
+                current.num_nodes += child.num_nodes;
+                current.num_leaves += child.num_leaves;
+                current.diameter = current.diameter.max(child.diameter);
+
+                heights.push(child.height + 1);
+            }
+
+            current.height = heights.first;
+            current.diameter = current.diameter.max(heights.first + heights.second);
+            stats.insert(current_id, current);
         }
-        0
     }
 
     /// Check if the tree is balanced (all leaf nodes are at most one level apart)
     ///
-    /// A tree is considered balanced if the heights of all subtrees differ by
-    /// at most 1.
+    /// A node is considered balanced if the heights of its child subtrees
+    /// differ by at most 1. Only the node's own children are compared; use
+    /// [`TreeLike::is_balanced`] to check every node of the subtree.
     ///
     /// # Examples
     ///
@@ -1548,24 +2043,71 @@ impl<T> Tree<T> {
     /// assert!(tree.is_balanced(root_id));
     /// ```
     pub fn is_balanced(&self, node_id: Number) -> bool {
-        if let Some(node) = self.get_node(node_id) {
-            if node.is_leaf() {
-                return true;
+        self.nodes.get(&FloatId::from(node_id)).is_none_or(|node| {
+            let heights = node
+                .children
+                .iter()
+                .map(|child_id| self.height(child_id.value()));
+            Self::balanced_height(heights).is_some()
+        })
+    }
+
+    /// Whether every node of the subtree is balanced, as `TreeLike` defines it
+    fn all_subtrees_balanced(&self, node_id: Number) -> bool {
+        // One postorder pass that measures each subtree once and returns at
+        // the first unbalanced node, rather than measuring the whole subtree
+        // through `height` before checking any of it
+        let node_id = FloatId::from(node_id);
+        let capacity = self.traversal_capacity(node_id);
+        let mut heights = IdMap::with_capacity_and_hasher(capacity, Default::default());
+        let mut visited = Pooled::<IdSet>::take();
+        visited.reserve(capacity);
+        let mut stack = Pooled::<Vec<(FloatId, bool)>>::take();
+        stack.push((node_id, false));
+
+        while let Some((current_id, expanded)) = stack.pop() {
+            let Some(node) = self.nodes.get(&current_id) else {
+                continue;
+            };
+
+            if !expanded {
+                if visited.insert(current_id) {
+                    stack.push((current_id, true));
+                    stack.extend(node.children.iter().map(|&child_id| (child_id, false)));
+                }
+                continue;
             }
 
-            let mut heights = Vec::new();
-            for child_id in node.children() {
-                heights.push(self.height(child_id));
-            }
-            heights.sort_by(|a, b| b.cmp(a));
+            // Missing children count as height 0, as they do for `height`
+            let child_heights = node
+                .children
+                .iter()
+                .map(|child_id| heights.get(child_id).copied().unwrap_or(0));
+            let Some(max_height) = Self::balanced_height(child_heights) else {
+                return false;
+            };
 
-            if let Some(&max_height) = heights.first() {
-                return heights.iter().all(|&h| max_height - h <= 1);
-            }
+            let height = if node.is_leaf() { 0 } else { max_height + 1 };
+            heights.insert(current_id, height);
         }
+
         true
     }
 
+    /// The largest of the child `heights` if they differ by at most 1
+    ///
+    /// Tracks the smallest and largest height in one pass instead of
+    /// collecting and sorting them.
+    fn balanced_height(heights: impl IntoIterator<Item = usize>) -> Option<usize> {
+        let mut min_height = usize::MAX;
+        let mut max_height = 0;
+        for height in heights {
+            min_height = min_height.min(height);
+            max_height = max_height.max(height);
+        }
+        (max_height <= min_height.saturating_add(1)).then_some(max_height)
+    }
+
     /// Get all leaf values in the subtree
     ///
     /// Returns a vector containing references to all leaf nodes
@@ -1611,17 +2153,30 @@ impl<T> Tree<T> {
     /// assert!(leaves.iter().any(|node| node.value == "grandchild"));
     /// ```
     pub fn get_leaves(&self, node_id: Number) -> Vec<&Node<T>> {
-        if let Some(node) = self.get_node(node_id) {
-            if node.is_leaf() {
-                return vec![node];
+        // Preorder walk that keeps only the leaves, collected into one vector
+        // instead of one per subtree
+        let node_id = FloatId::from(node_id);
+        let mut leaves = Vec::new();
+        let mut visited = Pooled::<IdSet>::take();
+        visited.reserve(self.traversal_capacity(node_id));
+        let mut stack = Pooled::<Vec<FloatId>>::take();
+        stack.push(node_id);
+
+        while let Some(current_id) = stack.pop() {
+            // Guard against cycles and shared subtrees being expanded twice
+            if !visited.insert(current_id) {
+                continue;
             }
-            let mut leaves = Vec::new();
-            for child_id in node.children() {
-                leaves.extend(self.get_leaves(child_id));
+            if let Some(node) = self.nodes.get(&current_id) {
+                if node.is_leaf() {
+                    leaves.push(node);
+                } else {
+                    stack.extend(node.children.iter().rev());
+                }
             }
-            return leaves;
         }
-        Vec::new()
+
+        leaves
     }
 
     /// Perform depth-first search traversal
@@ -1667,28 +2222,73 @@ impl<T> Tree<T> {
     /// assert_eq!(dfs_result.len(), 4);
     /// ```
     pub fn dfs(&self, node_id: Number) -> Vec<&Node<T>> {
-        let mut visited = HashSet::new();
-        let mut result = Vec::new();
-        self.dfs_recursive(FloatId::from(node_id), &mut visited, &mut result);
+        let node_id = FloatId::from(node_id);
+        let capacity = self.traversal_capacity(node_id);
+        let mut visited = Pooled::<IdSet>::take();
+        visited.reserve(capacity);
+        let mut result = Vec::with_capacity(capacity);
+        self.dfs_iterative(node_id, |id| visited.insert(id), &mut result);
+        result
+    }
+
+    /// Perform depth-first search traversal on a tree with integer ids
+    ///
+    /// Returns the same nodes in the same order as [`dfs`](Self::dfs), but
+    /// tracks visited nodes in a bitset sized for `n_nodes` instead of a
+    /// hash set. This is faster and far smaller when node ids are the
+    /// integers `0..n_nodes`, e.g. nodes created with [`Node::with_id`].
+    /// Ids outside that range still work; they fall back to a hash set.
+    ///
+    /// # Examples
+    ///
+    /// ```
+    /// use jangal::{Tree, Node};
+    ///
+    /// let mut tree = Tree::new();
+    /// for i in 0..4 {
+    ///     tree.add_node(Node::with_id(i, i as f64));
+    /// }
+    ///
+    /// // 0 -> 1 -> 3, 0 -> 2
+    /// for (parent, child) in [(0.0, 1.0), (0.0, 2.0), (1.0, 3.0)] {
+    ///     tree.get_node_mut(parent).unwrap().add_child(child);
+    ///     tree.get_node_mut(child).unwrap().set_parent(parent);
+    /// }
+    /// tree.set_root(0.0);
+    ///
+    /// let values: Vec<i32> = tree.dfs_indexed(0.0, 4).iter().map(|node| node.value).collect();
+    /// assert_eq!(values, vec![0, 1, 3, 2]);
+    /// ```
+    pub fn dfs_indexed(&self, node_id: Number, n_nodes: usize) -> Vec<&Node<T>> {
+        let node_id = FloatId::from(node_id);
+        let mut visited = IdBitset::new(n_nodes);
+        let mut result = Vec::with_capacity(self.traversal_capacity(node_id));
+        self.dfs_iterative(node_id, |id| visited.insert(id), &mut result);
         result
     }
 
-    fn dfs_recursive<'a>(
+    /// Depth-first walk from `node_id`; `visit` marks an id as visited and
+    /// returns true the first time it sees that id
+    fn dfs_iterative<'a>(
         &'a self,
         node_id: FloatId,
-        visited: &mut HashSet<FloatId>,
+        mut visit: impl FnMut(FloatId) -> bool,
         result: &mut Vec<&'a Node<T>>,
     ) {
-        if visited.contains(&node_id) {
-            return;
-        }
-
-        visited.insert(node_id);
+        // Explicit stack instead of recursion: deep trees cannot overflow the
+        // call stack. Children are pushed in reverse so they are visited in
+        // the same order as a recursive walk would visit them.
+        let mut stack = Pooled::<Vec<FloatId>>::take();
+        stack.push(node_id);
+
+        while let Some(current_id) = stack.pop() {
+            if !visit(current_id) {
+                continue;
+            }
 
-        if let Some(node) = self.nodes.get(&node_id) {
-            result.push(node);
-            for child_id in node.children() {
-                self.dfs_recursive(FloatId::from(child_id), visited, result);
+            if let Some(node) = self.nodes.get(&current_id) {
+                result.push(node);
+                stack.extend(node.children.iter().rev());
             }
         }
     }
@@ -1736,25 +2336,25 @@ impl<T> Tree<T> {
     /// assert_eq!(bfs_result.len(), 4);
     /// ```
     pub fn bfs(&self, node_id: Number) -> Vec<&Node<T>> {
-        let mut visited = HashSet::new();
-        let mut queue = VecDeque::new();
-        let mut result = Vec::new();
-
         let node_id = FloatId::from(node_id);
-        queue.push_back(node_id);
-        visited.insert(node_id);
+        let capacity = self.traversal_capacity(node_id);
+        let mut visited = Pooled::<IdSet>::take();
+        visited.reserve(capacity);
+        let mut result = Vec::with_capacity(capacity);
 
-        while let Some(current_id) = queue.pop_front() {
-            if let Some(node) = self.nodes.get(&current_id) {
-                result.push(node);
-                for child_id in node.children() {
-                    let child_id = FloatId::from(child_id);
-                    if !visited.contains(&child_id) {
-                        visited.insert(child_id);
-                        queue.push_back(child_id);
-                    }
+        visited.insert(node_id);
+        result.extend(self.nodes.get(&node_id));
+
+        // Nodes are appended in the order they are discovered, so the output
+        // doubles as the queue: no separate buffer, no per-node pop
+        let mut head = 0;
+        while let Some(node) = result.get(head) {
+            for child_id in &node.children {
+                if visited.insert(*child_id) {
+                    result.extend(self.nodes.get(child_id));
                 }
             }
+            head += 1;
         }
 
         result
@@ -1798,15 +2398,24 @@ impl<T> Tree<T> {
     /// ```
     pub fn preorder(&self, node_id: Number) -> Vec<&Node<T>> {
         let mut result = Vec::new();
-        self.preorder_recursive(FloatId::from(node_id), &mut result);
+        self.preorder_iterative(FloatId::from(node_id), &mut result);
         result
     }
 
-    fn preorder_recursive<'a>(&'a self, node_id: FloatId, result: &mut Vec<&'a Node<T>>) {
-        if let Some(node) = self.nodes.get(&node_id) {
-            result.push(node);
-            for child_id in node.children() {
-                self.preorder_recursive(FloatId::from(child_id), result);
+    fn preorder_iterative<'a>(&'a self, node_id: FloatId, result: &mut Vec<&'a Node<T>>) {
+        let mut visited = Pooled::<IdSet>::take();
+        visited.reserve(self.traversal_capacity(node_id));
+        let mut stack = Pooled::<Vec<FloatId>>::take();
+        stack.push(node_id);
+
+        while let Some(current_id) = stack.pop() {
+            // Guard against cycles and shared subtrees being expanded twice
+            if !visited.insert(current_id) {
+                continue;
+            }
+            if let Some(node) = self.nodes.get(&current_id) {
+                result.push(node);
+                stack.extend(node.children.iter().rev());
             }
         }
     }
@@ -1849,25 +2458,41 @@ impl<T> Tree<T> {
     /// ```
     pub fn postorder(&self, node_id: Number) -> Vec<&Node<T>> {
         let mut result = Vec::new();
-        self.postorder_recursive(FloatId::from(node_id), &mut result);
+        self.postorder_iterative(FloatId::from(node_id), &mut result);
         result
     }
 
-    fn postorder_recursive<'a>(&'a self, node_id: FloatId, result: &mut Vec<&'a Node<T>>) {
-        if let Some(node) = self.nodes.get(&node_id) {
-            for child_id in node.children() {
-                self.postorder_recursive(FloatId::from(child_id), result);
+    fn postorder_iterative<'a>(&'a self, node_id: FloatId, result: &mut Vec<&'a Node<T>>) {
+        // Each node is pushed twice: first to expand its children, then
+        // (once they have all been emitted) to emit the node itself
+        let mut visited = Pooled::<IdSet>::take();
+        visited.reserve(self.traversal_capacity(node_id));
+        let mut stack = Pooled::<Vec<(FloatId, bool)>>::take();
+        stack.push((node_id, false));
+
+        while let Some((current_id, expanded)) = stack.pop() {
+            if let Some(node) = self.nodes.get(&current_id) {
+                if expanded {
+                    result.push(node);
+                } else if visited.insert(current_id) {
+                    stack.push((current_id, true));
+                    stack.extend(
+                        node.children
+                            .iter()
+                            .rev()
+                            .map(|&child_id| (child_id, false)),
+                    );
+                }
             }
         }
-        if let Some(node) = self.nodes.get(&node_id) {
-            result.push(node);
-        }
     }
 
     /// Perform inorder traversal
     ///
     /// Traverses the subtree in inorder: left subtree, root, right subtree.
-    /// Returns a vector of nodes in traversal order.
+    /// For nodes with more than two children, the first child's subtree
+    /// comes before the node and the remaining children's subtrees follow
+    /// it. Returns a vector of nodes in traversal order.
     ///
     /// # Examples
     ///
@@ -1902,16 +2527,36 @@ impl<T> Tree<T> {
     /// ```
     pub fn inorder(&self, node_id: Number) -> Vec<&Node<T>> {
         let mut result = Vec::new();
-        self.inorder_recursive(FloatId::from(node_id), &mut result);
+        self.inorder_iterative(FloatId::from(node_id), &mut result);
         result
     }
 
-    fn inorder_recursive<'a>(&'a self, node_id: FloatId, result: &mut Vec<&'a Node<T>>) {
-        if let Some(node) = self.nodes.get(&node_id) {
-            for child_id in node.children() {
-                self.inorder_recursive(FloatId::from(child_id), result);
+    fn inorder_iterative<'a>(&'a self, node_id: FloatId, result: &mut Vec<&'a Node<T>>) {
+        // Expanding a node schedules its first child, then the node itself,
+        // then the remaining children; the stack pops them in that order
+        let mut visited = Pooled::<IdSet>::take();
+        visited.reserve(self.traversal_capacity(node_id));
+        let mut stack = Pooled::<Vec<(FloatId, bool)>>::take();
+        stack.push((node_id, false));
+
+        while let Some((current_id, expanded)) = stack.pop() {
+            if let Some(node) = self.nodes.get(&current_id) {
+                if expanded {
+                    result.push(node);
+                    continue;
+                }
+                if !visited.insert(current_id) {
+                    continue;
+                }
+
+                let (first, rest) = match node.children.split_first() {
+                    Some((first, rest)) => (Some(first), rest),
+                    None => (None, &[][..]),
+                };
+                stack.extend(rest.iter().rev().map(|&child_id| (child_id, false)));
+                stack.push((current_id, true));
+                stack.extend(first.map(|&child_id| (child_id, false)));
             }
-            result.push(node);
         }
     }
 }
@@ -1955,6 +2600,17 @@ mod tests {
         assert_eq!(display_str, "Node(value=42)");
     }
 
+    #[test]
+    fn test_generated_ids_are_unique_and_increasing() {
+        let ids: Vec<Number> = (0..100).map(|i| Node::new(i).id).collect();
+        assert!(ids.iter().all(|&id| id >= 1.0));
+        assert!(ids.windows(2).all(|pair| pair[0] < pair[1]));
+
+        // A custom id bypasses the counter entirely
+        assert_eq!(Node::with_id(0, 12345.0).id, 12345.0);
+        assert!(Node::new(0).id > ids[99]);
+    }
+
     #[test]
     fn test_node_relationships() {
         let mut parent = Node::new("parent");
@@ -1973,6 +2629,11 @@ mod tests {
         let child2 = Node::new("child2");
         parent.add_child(child2.id);
         assert_eq!(parent.num_children(), 2);
+        assert_eq!(parent.children(), vec![child.id, child2.id]);
+
+        // Adding an existing child does not duplicate it
+        parent.add_child(child2.id);
+        assert_eq!(parent.num_children(), 2);
 
         // Test removing child
         parent.remove_child(child2.id);
@@ -1985,6 +2646,162 @@ mod tests {
         assert!(child.is_root() && child.is_leaf());
     }
 
+    #[test]
+    fn test_child_list_spills_to_heap() {
+        let mut children = ChildList::new();
+        assert!(children.is_empty());
+
+        for id in 1..=2 {
+            children.push(FloatId::from(id as f64));
+        }
+        assert!(matches!(children, ChildList::Inline { len: 2, .. }));
+        children.remove(0);
+        assert_eq!(&children[..], &[FloatId::from(2.0)]);
+
+        for id in 3..=5 {
+            children.push(FloatId::from(id as f64));
+        }
+        assert!(matches!(children, ChildList::Heap(_)));
+        children.remove(1);
+        let ids: Vec<Number> = children.iter().map(|id| id.value()).collect();
+        assert_eq!(ids, vec![2.0, 4.0, 5.0]);
+
+        // Nodes with up to two children keep them inline, in no more room
+        // than a Vec and its tag
+        assert!(std::mem::size_of::<ChildList>() <= std::mem::size_of::<Vec<FloatId>>() + 8);
+        let mut node = Node::new(0);
+        assert!(matches!(node.children, ChildList::Inline { len: 0, .. }));
+        node.add_child(1.0);
+        node.add_child(2.0);
+        node.add_child(2.0);
+        assert!(matches!(node.children, ChildList::Inline { len: 2, .. }));
+        node.add_child(3.0);
+        assert!(matches!(node.children, ChildList::Heap(_)));
+        assert_eq!(node.children(), vec![1.0, 2.0, 3.0]);
+    }
+
+    #[test]
+    fn test_wide_node_indexes_children() {
+        let mut node = Node::new(0);
+        for id in 1..=100 {
+            node.add_child(id as f64);
+            node.add_child(id as f64);
+        }
+        assert!(matches!(node.children, ChildList::Wide(_)));
+        assert_eq!(node.num_children(), 100);
+        assert!(node.has_child(50.0) && !node.has_child(101.0));
+
+        node.remove_child(50.0);
+        node.remove_child(50.0);
+        assert!(!node.has_child(50.0));
+        assert_eq!(node.num_children(), 99);
+        let expected: Vec<Number> = (1..=100).filter(|&id| id != 50).map(f64::from).collect();
+        assert_eq!(node.children(), expected);
+    }
+
+    #[test]
+    fn test_wide_and_narrow_nodes_dedup_alike() {
+        let nan = f64::from_bits(f64::NAN.to_bits() | 1);
+        for width in [0, 100] {
+            let mut node = Node::new(0);
+            for id in 1..=width {
+                node.add_child(id as f64);
+            }
+            node.add_child(0.0);
+            node.add_child(-0.0);
+            node.add_child(f64::NAN);
+            node.add_child(nan);
+            assert_eq!(node.num_children(), width + 2);
+            assert!(node.has_child(-0.0) && node.has_child(nan));
+
+            node.remove_child(-0.0);
+            node.remove_child(nan);
+            assert!(!node.has_child(0.0) && !node.has_child(f64::NAN));
+            assert_eq!(node.num_children(), width);
+        }
+    }
+
+    #[test]
+    fn test_link_packs_optional_id() {
+        assert_eq!(std::mem::size_of::<Link>(), std::mem::size_of::<FloatId>());
+        assert!(Link::NONE.get().is_none());
+
+        for id in [0.0, -0.0, 1.0, -7.5, f64::MAX, f64::INFINITY, f64::NAN] {
+            let link = Link::to(FloatId::from(id));
+            assert!(link.is_some());
+            assert_eq!(link.get().unwrap().value().to_bits(), id.to_bits());
+        }
+
+        // A NaN id with the reserved payload is still a link
+        let reserved = f64::from_bits(Link::NONE.0);
+        let link = Link::to(FloatId::from(reserved));
+        assert!(link.is_some());
+        assert!(link.get().unwrap().value().is_nan());
+        let mut node = Node::new(0u64);
+        node.set_parent(reserved);
+        assert!(node.parent().is_some_and(f64::is_nan));
+
+        // parent, left and right cost one id each
+        let mut node = Node::new(0u64);
+        assert!(std::mem::size_of_val(&node) <= 80);
+        node.set_left(2.0);
+        node.set_parent(1.0);
+        assert_eq!(
+            (node.parent(), node.left(), node.right()),
+            (Some(1.0), Some(2.0), None)
+        );
+    }
+
+    #[test]
+    fn test_pooled_buffers_are_reused_empty() {
+        let pooled = || ID_STACKS.with(|pool| pool.borrow().len());
+        let mut stack = Pooled::<Vec<FloatId>>::take();
+        stack.extend([FloatId::from(1.0), FloatId::from(2.0)]);
+        let buffer = stack.as_ptr();
+        let before = pooled();
+        drop(stack);
+        assert_eq!(pooled(), before + 1);
+
+        // Handed back cleared, with its allocation intact
+        let mut outer = Pooled::<Vec<FloatId>>::take();
+        assert!(outer.is_empty());
+        assert_eq!(outer.as_ptr(), buffer);
+        // Nested traversals get buffers of their own
+        let inner = Pooled::<Vec<FloatId>>::take();
+        assert_ne!(inner.as_ptr(), buffer);
+        drop(inner);
+
+        // Oversized buffers are freed rather than kept
+        let before = pooled();
+        outer.reserve(MAX_POOLED_CAPACITY + 1);
+        drop(outer);
+        assert_eq!(pooled(), before);
+    }
+
+    #[test]
+    fn test_small_traversal_does_not_inherit_large_set() {
+        let mut tree = Tree::new();
+        let mut root = Node::new(0);
+        let root_id = root.id;
+        let mut leaf_id = root_id;
+        for i in 1..4 * MAX_POOLED_SET_CAPACITY as i32 {
+            let mut leaf = Node::new(i);
+            leaf.set_parent(root_id);
+            leaf_id = tree.add_node(leaf).unwrap();
+            root.add_child(leaf_id);
+        }
+        tree.add_node(root);
+        tree.set_root(root_id);
+
+        // The big visited set is freed, not kept for the next traversal
+        assert_eq!(tree.dfs(root_id).len(), 4 * MAX_POOLED_SET_CAPACITY);
+        let largest_pooled =
+            VISITED_SETS.with(|pool| pool.borrow().iter().map(IdSet::capacity).max());
+        assert!(largest_pooled.unwrap_or(0) <= MAX_POOLED_SET_CAPACITY);
+        assert!(Pooled::<IdSet>::take().capacity() <= MAX_POOLED_SET_CAPACITY);
+        assert_eq!(tree.dfs(leaf_id).len(), 1);
+    }
+
     #[test]
     fn test_binary_tree_operations() {
         let mut root = Node::new(10);
@@ -2006,6 +2823,24 @@ mod tests {
         assert_eq!(root.right(), None);
     }
 
+    #[test]
+    fn test_id_hasher_spreads_integer_ids() {
+        use std::hash::BuildHasher;
+
+        // Integer-valued ids differ only in their high bits; the low bits
+        // that pick a bucket must still vary
+        let buckets: HashSet<u64> = (1..=1024)
+            .map(|i| IdBuildHasher::default().hash_one(FloatId::from(i as f64)) & 1023)
+            .collect();
+        assert!(buckets.len() > 500, "{} buckets used", buckets.len());
+
+        let fractional = IdBuildHasher::default().hash_one(FloatId::from(0.5));
+        assert_ne!(
+            fractional,
+            IdBuildHasher::default().hash_one(FloatId::from(1.5))
+        );
+    }
+
     #[test]
     fn test_float_id_functionality() {
         use std::collections::HashMap;
@@ -2110,6 +2945,10 @@ mod tests {
         assert_eq!(preorder_result.len(), 5);
         assert_eq!(postorder_result.len(), 5);
 
+        // grandchild1 -> child1 -> root -> child2 -> grandchild2
+        assert_eq!(tree.diameter(root_id), 4);
+        assert_eq!(tree.diameter(child1_id), 1);
+
         // Verify traversal order
         assert_eq!(preorder_result[0].id, root_id);
         assert_eq!(postorder_result[4].id, root_id);
@@ -2134,6 +2973,262 @@ mod tests {
         assert!(tree.is_balanced(grandchild1_id)); // leaf node is always balanced
     }
 
+    #[test]
+    fn test_is_balanced_detects_uneven_children() {
+        // root has a leaf child and a child with a chain of two below it
+        let mut tree = Tree::new();
+        let ids: Vec<Number> = (0..5)
+            .map(|i| tree.add_node(Node::new(i)).unwrap())
+            .collect();
+        for (parent, child) in [(0, 1), (0, 2), (2, 3), (3, 4)] {
+            tree.get_node_mut(ids[parent])
+                .unwrap()
+                .add_child(ids[child]);
+            tree.get_node_mut(ids[child])
+                .unwrap()
+                .set_parent(ids[parent]);
+        }
+        tree.set_root(ids[0]);
+
+        assert!(!tree.is_balanced(ids[0]));
+        assert!(!TreeLike::is_balanced(&tree, ids[0]));
+        assert!(tree.is_balanced(ids[2]));
+        assert_eq!(tree.diameter(ids[0]), 4);
+
+        // Both root children have height 3, but the first one has children
+        // of heights 2 and 0: the root is only balanced at the top level,
+        // which is all the inherent method compares
+        let mut tree = Tree::new();
+        let ids: Vec<Number> = (0..10)
+            .map(|i| tree.add_node(Node::new(i)).unwrap())
+            .collect();
+        let edges = [
+            (0, 1),
+            (0, 2),
+            (1, 3),
+            (1, 4),
+            (3, 5),
+            (5, 6),
+            (2, 7),
+            (7, 8),
+            (8, 9),
+        ];
+        for (parent, child) in edges {
+            tree.get_node_mut(ids[parent])
+                .unwrap()
+                .add_child(ids[child]);
+            tree.get_node_mut(ids[child])
+                .unwrap()
+                .set_parent(ids[parent]);
+        }
+        tree.set_root(ids[0]);
+
+        assert_eq!(tree.height(ids[1]), tree.height(ids[2]));
+        assert!(!tree.is_balanced(ids[1]));
+        assert!(tree.is_balanced(ids[0]));
+        assert!(!TreeLike::is_balanced(&tree, ids[0]));
+        assert!(tree.is_balanced(ids[2]));
+
+        // A chain too deep for recursion, next to a single leaf
+        let mut tree = Tree::new();
+        let ids: Vec<Number> = (0..100_002)
+            .map(|i| tree.add_node(Node::new(i)).unwrap())
+            .collect();
+        for (parent, child) in (0..100_000).map(|i| (i, i + 1)).chain([(0, 100_001)]) {
+            tree.get_node_mut(ids[parent])
+                .unwrap()
+                .add_child(ids[child]);
+        }
+        assert!(!tree.is_balanced(ids[0]));
+        assert!(tree.is_balanced(ids[1]));
+        assert!(tree.is_balanced(-1.0));
+    }
+
+    #[test]
+    fn test_top_two() {
+        let mut top = TopTwo::default();
+        for value in [3, 1, 4, 1, 5, 9, 2, 6] {
+            top.push(value);
+        }
+        assert_eq!(
+            top,
+            TopTwo {
+                first: 9,
+                second: 6
+            }
+        );
+
+        // Ties keep both copies
+        let mut top = TopTwo::default();
+        top.push(2);
+        top.push(2);
+        assert_eq!(
+            top,
+            TopTwo {
+                first: 2,
+                second: 2
+            }
+        );
+    }
+
+    #[test]
+    fn test_deep_tree_traversals() {
+        // A single chain deeper than a recursive walk could handle comfortably
+        let mut tree = Tree::new();
+        let mut ids = Vec::new();
+        for i in 0..100_000 {
+            ids.push(tree.add_node(Node::new(i)).unwrap());
+        }
+        for pair in ids.windows(2) {
+            tree.get_node_mut(pair[0]).unwrap().add_child(pair[1]);
+            tree.get_node_mut(pair[1]).unwrap().set_parent(pair[0]);
+        }
+
+        let root_id = ids[0];
+        let dfs_values: Vec<i32> = tree.dfs(root_id).iter().map(|n| n.value).collect();
+        let preorder_values: Vec<i32> = tree.preorder(root_id).iter().map(|n| n.value).collect();
+        let postorder_values: Vec<i32> = tree.postorder(root_id).iter().map(|n| n.value).collect();
+
+        assert_eq!(dfs_values, (0..100_000).collect::<Vec<_>>());
+        assert_eq!(preorder_values, dfs_values);
+        assert_eq!(postorder_values, (0..100_000).rev().collect::<Vec<_>>());
+
+        assert_eq!(tree.height(root_id), 99_999);
+        assert_eq!(tree.num_nodes(root_id), 100_000);
+        assert_eq!(tree.num_leaves(root_id), 1);
+        assert_eq!(tree.diameter(root_id), 99_999);
+    }
+
+    #[test]
+    fn test_dfs_indexed_matches_dfs() {
+        let mut tree = Tree::new();
+        for i in 0..200 {
+            tree.add_node(Node::with_id(i, i as f64));
+        }
+        // A node with an id outside 0..n_nodes, and one with a fractional id
+        tree.add_node(Node::with_id(200, 1000.0));
+        tree.add_node(Node::with_id(201, 2.5));
+
+        let mut link = |parent: f64, child: f64| {
+            tree.get_node_mut(parent).unwrap().add_child(child);
+            tree.get_node_mut(child).unwrap().set_parent(parent);
+        };
+        for i in 1..200 {
+            link(((i - 1) / 3) as f64, i as f64);
+        }
+        link(5.0, 1000.0);
+        link(1000.0, 2.5);
+        // A back edge: the walk must not revisit the root
+        tree.get_node_mut(2.5).unwrap().add_child(0.0);
+        tree.set_root(0.0);
+
+        let ids = |nodes: Vec<&Node<i32>>| -> Vec<Number> {
+            nodes.into_iter().map(|node| node.id).collect()
+        };
+        let expected = ids(tree.dfs(0.0));
+        assert_eq!(expected.len(), 202);
+        assert_eq!(ids(tree.dfs_indexed(0.0, 200)), expected);
+        // An undersized bitset still gives the same answer
+        assert_eq!(ids(tree.dfs_indexed(0.0, 10)), expected);
+        assert_eq!(ids(tree.dfs_indexed(4.0, 200)), ids(tree.dfs(4.0)));
+        assert!(tree.dfs_indexed(-1.0, 200).is_empty());
+    }
+
+    #[test]
+    fn test_traversal_orders() {
+        //      0
+        //    / | \
+        //   1  2  3
+        //  / \
+        // 4   5
+        let mut tree = Tree::new();
+        let ids: Vec<Number> = (0..6)
+            .map(|i| tree.add_node(Node::new(i)).unwrap())
+            .collect();
+        for (parent, child) in [(0, 1), (0, 2), (0, 3), (1, 4), (1, 5)] {
+            tree.get_node_mut(ids[parent])
+                .unwrap()
+                .add_child(ids[child]);
+            tree.get_node_mut(ids[child])
+                .unwrap()
+                .set_parent(ids[parent]);
+        }
+        tree.set_root(ids[0]);
+
+        let values = |nodes: Vec<&Node<i32>>| -> Vec<i32> {
+            nodes.into_iter().map(|node| node.value).collect()
+        };
+        assert_eq!(values(tree.inorder(ids[0])), vec![4, 1, 5, 0, 2, 3]);
+        assert_eq!(values(tree.bfs(ids[0])), vec![0, 1, 2, 3, 4, 5]);
+        assert_eq!(values(tree.bfs(ids[1])), vec![1, 4, 5]);
+        assert!(tree.bfs(-1.0).is_empty());
+        assert_eq!(values(tree.get_leaves(ids[0])), vec![4, 5, 2, 3]);
+        assert_eq!(values(tree.get_leaves(ids[3])), vec![3]);
+        assert!(tree.get_leaves(-1.0).is_empty());
+
+        // A back edge from 5 to the root: each node is still expanded once
+        tree.get_node_mut(ids[5]).unwrap().add_child(ids[0]);
+        assert_eq!(values(tree.inorder(ids[0])), vec![4, 1, 5, 0, 2, 3]);
+        assert_eq!(values(tree.get_leaves(ids[0])), vec![4, 2, 3]);
+        assert_eq!(values(tree.preorder(ids[0])), vec![0, 1, 4, 5, 2, 3]);
+        assert_eq!(values(tree.postorder(ids[0])), vec![4, 5, 1, 2, 3, 0]);
+    }
+
+    #[test]
+    fn test_cached_height_and_depth_follow_changes() {
+        let mut tree = Tree::new();
+        let root_id = tree.add_node(Node::new("root")).unwrap();
+        let child_id = tree.add_node(Node::new("child")).unwrap();
+
+        tree.get_node_mut(root_id).unwrap().add_child(child_id);
+        tree.get_node_mut(child_id).unwrap().set_parent(root_id);
+
+        assert_eq!(tree.height(root_id), 1);
+        assert_eq!(tree.depth(child_id), 1);
+        // Served from the cache the second time around
+        assert_eq!(tree.height(root_id), 1);
+        assert_eq!(tree.depth(child_id), 1);
+
+        // Growing the tree must not return stale values
+        let grandchild_id = tree.add_node(Node::new("grandchild")).unwrap();
+        tree.get_node_mut(child_id)
+            .unwrap()
+            .add_child(grandchild_id);
+        tree.get_node_mut(grandchild_id)
+            .unwrap()
+            .set_parent(child_id);
+
+        assert_eq!(tree.height(root_id), 2);
+        assert_eq!(tree.height(child_id), 1);
+        assert_eq!(tree.depth(grandchild_id), 2);
+        assert_eq!(tree.num_nodes(root_id), 3);
+        assert_eq!(tree.num_leaves(root_id), 1);
+        assert_eq!(tree.diameter(root_id), 2);
+
+        // Neither do clones of a tree with a warm cache
+        let cloned = tree.clone();
+        assert_eq!(cloned.height(root_id), 2);
+        assert_eq!(cloned.depth(grandchild_id), 2);
+
+        // Re-rooting the child detaches it from the old root
+        tree.get_node_mut(child_id).unwrap().remove_parent();
+        tree.get_node_mut(root_id).unwrap().remove_child(child_id);
+
+        assert_eq!(tree.height(root_id), 0);
+        assert_eq!(tree.depth(grandchild_id), 1);
+        assert_eq!(tree.num_nodes(root_id), 1);
+        assert_eq!(tree.num_leaves(root_id), 1);
+        assert_eq!(tree.diameter(child_id), 1);
+
+        // A subtree measured first is reused when measuring its ancestors
+        tree.get_node_mut(root_id).unwrap().add_child(child_id);
+        tree.get_node_mut(child_id).unwrap().set_parent(root_id);
+        assert_eq!(tree.num_nodes(child_id), 2);
+        assert_eq!(tree.num_nodes(root_id), 3);
+        assert_eq!(tree.diameter(root_id), 2);
+        assert_eq!(tree.num_nodes(-1.0), 0);
+    }
+
     #[test]
     fn test_infinite_recursion() {
         let mut tree = Tree::new();
@@ -1,3 +1,5 @@
+use std::sync::{Mutex, PoisonError};
+
 use crate::Tree;
 use crate::{Node, Number};
 
@@ -31,6 +33,34 @@ use crate::{Node, Number};
 #[derive(Debug)]
 pub struct BST<T: Ord + Clone> {
     tree: Tree<T>,
+    // Bumped by every method that can change the structure
+    version: u64,
+    // Node ids of the last boundary traversal and the version it was for
+    boundary_cache: Mutex<Option<(u64, Vec<Number>)>>,
+    // Ids of the minimum and maximum nodes. None when the tree has been
+    // handed out mutably, since it can then be reshaped behind the BST's
+    // back; the next insert or delete finds them again.
+    ends: Option<Ends>,
+}
+
+/// Ids of the nodes holding the smallest and largest elements of a BST
+///
+/// Inserts update them with the comparisons their walk already makes, and
+/// deletes walk a spine only when they remove one of the two nodes, so
+/// `min` and `max` are a single lookup.
+#[derive(Debug, Clone, Copy, Default)]
+struct Ends {
+    head: Option<Number>,
+    tail: Option<Number>,
+}
+
+/// Position of a node relative to the boundary of a BST
+#[derive(Debug, Clone, Copy, PartialEq, Eq)]
+enum Boundary {
+    Root,
+    LeftEdge,
+    RightEdge,
+    Interior,
 }
 
 impl<T: Ord + Clone> BST<T> {
@@ -47,7 +77,12 @@ impl<T: Ord + Clone> BST<T> {
     /// assert_eq!(bst.size(), 0);
     /// ```
     pub fn new() -> Self {
-        Self { tree: Tree::new() }
+        Self {
+            tree: Tree::new(),
+            version: 0,
+            boundary_cache: Mutex::new(None),
+            ends: Some(Ends::default()),
+        }
     }
 
     /// Get a reference to the underlying tree structure
@@ -96,12 +131,16 @@ impl<T: Ord + Clone> BST<T> {
     /// // Perform advanced tree operations...
     /// ```
     pub fn as_tree_mut(&mut self) -> &mut Tree<T> {
+        self.version += 1;
+        self.ends = None;
         &mut self.tree
     }
 
     /// Insert an element into the BST
     ///
     /// If the element already exists, it will not be inserted (no duplicates).
+    /// Returns true if the element was inserted, so "insert if absent" needs
+    /// no separate `search`.
     ///
     /// # Examples
     ///
@@ -110,72 +149,197 @@ impl<T: Ord + Clone> BST<T> {
     /// use jangal::TreeLike;
     ///
     /// let mut bst = BST::new();
-    /// bst.insert(5);
-    /// bst.insert(3);
-    /// bst.insert(7);
+    /// assert!(bst.insert(5));
+    /// assert!(bst.insert(3));
+    /// assert!(bst.insert(7));
+    /// assert!(!bst.insert(3));
     ///
     /// assert_eq!(bst.size(), 3);
     /// assert!(bst.search(&5).is_some());
     /// assert!(bst.search(&3).is_some());
     /// assert!(bst.search(&7).is_some());
     /// ```
-    pub fn insert(&mut self, element: T) {
-        if self.tree.is_empty() {
+    pub fn insert(&mut self, element: T) -> bool {
+        let mut ends = self.ends.unwrap_or_else(|| self.find_ends());
+        let Some(mut node_id) = self.tree.root_id() else {
             let node = Node::new(element);
             if let Some(id) = self.tree.add_node(node) {
                 self.tree.set_root(id);
+                self.ends = Some(Ends {
+                    head: Some(id),
+                    tail: Some(id),
+                });
             }
-            return;
-        }
-
-        let root_id = self.tree.root_id().unwrap();
-        self.insert_recursive(root_id, element);
-    }
-
-    fn insert_recursive(&mut self, node_id: Number, element: T) {
-        if let Some(node) = self.tree.get_node(node_id) {
-            let current_value = &node.value;
+            self.version += 1;
+            return true;
+        };
 
-            match element.cmp(current_value) {
+        // Walk down to the empty child slot the element belongs in; a loop
+        // rather than recursion so degenerate trees cannot overflow the stack.
+        // A walk that only ever turns left ends at the new minimum, and one
+        // that only ever turns right at the new maximum.
+        let (mut new_min, mut new_max) = (true, true);
+        let left = loop {
+            let Some(node) = self.tree.get_node(node_id) else {
+                return false;
+            };
+            let (next_id, left) = match element.cmp(&node.value) {
                 std::cmp::Ordering::Less => {
-                    if let Some(left_id) = node.left() {
-                        self.insert_recursive(left_id, element);
-                    } else {
-                        let new_node = Node::new(element);
-                        if let Some(new_id) = self.tree.add_node(new_node) {
-                            if let Some(parent) = self.tree.get_node_mut(node_id) {
-                                parent.set_left(new_id);
-                                parent.add_child(new_id);
-                            }
-                            if let Some(child) = self.tree.get_node_mut(new_id) {
-                                child.set_parent(node_id);
-                            }
-                        }
-                    }
+                    new_max = false;
+                    (node.left(), true)
                 }
                 std::cmp::Ordering::Greater => {
-                    if let Some(right_id) = node.right() {
-                        self.insert_recursive(right_id, element);
-                    } else {
-                        let new_node = Node::new(element);
-                        if let Some(new_id) = self.tree.add_node(new_node) {
-                            if let Some(parent) = self.tree.get_node_mut(node_id) {
-                                parent.set_right(new_id);
-                                parent.add_child(new_id);
-                            }
-                            if let Some(child) = self.tree.get_node_mut(new_id) {
-                                child.set_parent(node_id);
-                            }
-                        }
-                    }
-                }
-                std::cmp::Ordering::Equal => {
-                    // Element already exists, do nothing
+                    new_min = false;
+                    (node.right(), false)
                 }
+                // Element already exists, do nothing
+                std::cmp::Ordering::Equal => return false,
+            };
+            match next_id {
+                Some(next_id) => node_id = next_id,
+                None => break left,
+            }
+        };
+
+        let Some(new_id) = self.tree.add_node(Node::new(element)) else {
+            return false;
+        };
+        self.link(node_id, new_id, left);
+        if new_min {
+            ends.head = Some(new_id);
+        }
+        if new_max {
+            ends.tail = Some(new_id);
+        }
+        self.ends = Some(ends);
+        self.version += 1;
+        true
+    }
+
+    /// Find the minimum and maximum nodes by walking down both spines
+    fn find_ends(&self) -> Ends {
+        let root_id = self.tree.root_id();
+        Ends {
+            head: root_id.map(|root_id| self.find_min(root_id)),
+            tail: root_id.map(|root_id| self.find_max(root_id)),
+        }
+    }
+
+    /// Attach `child_id` as the left (or right) child of `parent_id`
+    fn link(&mut self, parent_id: Number, child_id: Number, left: bool) {
+        if let Some(parent) = self.tree.get_node_mut(parent_id) {
+            if left {
+                parent.set_left(child_id);
+            } else {
+                parent.set_right(child_id);
             }
+            parent.add_child(child_id);
+        }
+        if let Some(child) = self.tree.get_node_mut(child_id) {
+            child.set_parent(parent_id);
         }
     }
 
+    /// Build a height-balanced tree from sorted, deduplicated elements
+    ///
+    /// Each element becomes the root of the range it is the median of, so
+    /// the elements are linked directly, without any comparisons. Only used
+    /// on an empty BST, whose minimum and maximum it records. Returns the
+    /// root.
+    fn build_balanced(&mut self, elements: Vec<T>) -> Option<Number> {
+        let len = elements.len();
+        let mut slots: Vec<Option<T>> = elements.into_iter().map(Some).collect();
+        let mut ends = Ends::default();
+        let mut root_id = None;
+
+        // Explicit stack of (range start, range end, parent, is left child)
+        let mut stack = vec![(0, len, None, false)];
+        while let Some((lo, hi, parent_id, left)) = stack.pop() {
+            if lo >= hi {
+                continue;
+            }
+            let mid = lo + (hi - lo) / 2;
+            let Some(node_id) = slots[mid]
+                .take()
+                .and_then(|element| self.tree.add_node(Node::new(element)))
+            else {
+                continue;
+            };
+            if mid == 0 {
+                ends.head = Some(node_id);
+            }
+            if mid + 1 == len {
+                ends.tail = Some(node_id);
+            }
+
+            match parent_id {
+                Some(parent_id) => self.link(parent_id, node_id, left),
+                None => root_id = Some(node_id),
+            }
+            // Left is popped first, so children keep the left, right order
+            stack.push((mid + 1, hi, Some(node_id), false));
+            stack.push((lo, mid, Some(node_id), true));
+        }
+
+        self.ends = Some(ends);
+        root_id
+    }
+
+    /// Insert many elements at once
+    ///
+    /// The elements are sorted and deduplicated once. An empty BST is then
+    /// built directly as a height-balanced tree, in O(n log n) overall for
+    /// the sort and O(n) for the build. A non-empty BST gets the new
+    /// elements inserted medians first, so they spread over the existing
+    /// tree instead of forming a chain when the input is sorted. Returns
+    /// the number of elements that were not already present.
+    ///
+    /// # Examples
+    ///
+    /// ```
+    /// use jangal::BST;
+    ///
+    /// let mut bst = BST::new();
+    /// assert_eq!(bst.bulk_insert(1..=7), 7);
+    /// assert_eq!(bst.height(), 3);
+    ///
+    /// // Existing elements are skipped
+    /// assert_eq!(bst.bulk_insert(vec![7, 8, 9, 8]), 2);
+    /// assert_eq!(bst.size(), 9);
+    /// ```
+    pub fn bulk_insert<I: IntoIterator<Item = T>>(&mut self, elements: I) -> usize {
+        let mut elements: Vec<T> = elements.into_iter().collect();
+        elements.sort();
+        elements.dedup();
+
+        if self.tree.is_empty() {
+            let len = elements.len();
+            if let Some(root_id) = self.build_balanced(elements) {
+                self.tree.set_root(root_id);
+            }
+            self.version += 1;
+            return len;
+        }
+
+        let len = elements.len();
+        let mut slots: Vec<Option<T>> = elements.into_iter().map(Some).collect();
+        let mut inserted = 0;
+        let mut ranges = vec![(0, len)];
+        while let Some((lo, hi)) = ranges.pop() {
+            if lo >= hi {
+                continue;
+            }
+            let mid = lo + (hi - lo) / 2;
+            if let Some(element) = slots[mid].take() {
+                inserted += usize::from(self.insert(element));
+            }
+            ranges.push((mid + 1, hi));
+            ranges.push((lo, mid));
+        }
+
+        inserted
+    }
+
     /// Search for an element in the BST
     ///
     /// Returns the ID of the node containing the element, or None if not found.
@@ -194,37 +358,16 @@ impl<T: Ord + Clone> BST<T> {
     /// assert!(bst.search(&10).is_none());
     /// ```
     pub fn search(&self, element: &T) -> Option<Number> {
-        if let Some(root_id) = self.tree.root_id() {
-            self.search_recursive(root_id, element)
-        } else {
-            None
-        }
-    }
-
-    fn search_recursive(&self, node_id: Number, element: &T) -> Option<Number> {
-        if let Some(node) = self.tree.get_node(node_id) {
-            let current_value = &node.value;
-
-            match element.cmp(current_value) {
-                std::cmp::Ordering::Less => {
-                    if let Some(left_id) = node.left() {
-                        self.search_recursive(left_id, element)
-                    } else {
-                        None
-                    }
-                }
-                std::cmp::Ordering::Greater => {
-                    if let Some(right_id) = node.right() {
-                        self.search_recursive(right_id, element)
-                    } else {
-                        None
-                    }
-                }
-                std::cmp::Ordering::Equal => Some(node_id),
-            }
-        } else {
-            None
+        let mut current = self.tree.root_id();
+        while let Some(node_id) = current {
+            let node = self.tree.get_node(node_id)?;
+            current = match element.cmp(&node.value) {
+                std::cmp::Ordering::Less => node.left(),
+                std::cmp::Ordering::Greater => node.right(),
+                std::cmp::Ordering::Equal => return Some(node_id),
+            };
         }
+        None
     }
 
     /// Delete an element from the BST
@@ -246,114 +389,112 @@ impl<T: Ord + Clone> BST<T> {
     /// assert!(!bst.contains(&3));
     /// ```
     pub fn delete(&mut self, element: &T) {
-        if let Some(node_id) = self.search(element) {
-            self.delete_node(node_id);
-        }
-    }
-
-    fn delete_node(&mut self, node_id: Number) {
-        // First, get all the information we need from the node
-        let node_info = if let Some(node) = self.tree.get_node(node_id) {
-            (node.left(), node.right(), node.parent(), node.value.clone())
-        } else {
-            return;
+        // One walk down finds the node and, if it has two children, carries
+        // on to its successor. Each node's links are read on the way, so
+        // nothing is looked up a second time before relinking.
+        let mut current = self.tree.root_id();
+        let (node_id, left_id, right_id, parent_id) = loop {
+            let Some(node) = current.and_then(|id| self.tree.get_node(id)) else {
+                return;
+            };
+            current = match element.cmp(&node.value) {
+                std::cmp::Ordering::Less => node.left(),
+                std::cmp::Ordering::Greater => node.right(),
+                std::cmp::Ordering::Equal => {
+                    break (node.id, node.left(), node.right(), node.parent());
+                }
+            };
         };
 
-        let (has_left, has_right, parent_id, _node_value) = node_info;
-        let has_left = has_left.is_some();
-        let has_right = has_right.is_some();
-
-        match (has_left, has_right) {
-            (false, false) => {
-                // Leaf node - just remove it
-                if let Some(parent_id) = parent_id {
-                    if let Some(parent) = self.tree.get_node_mut(parent_id) {
-                        if parent.left() == Some(node_id) {
-                            parent.clear_left();
-                        } else if parent.right() == Some(node_id) {
-                            parent.clear_right();
+        match (left_id, right_id) {
+            (Some(_), Some(right_id)) => {
+                // Node with two children: take over the value of the inorder
+                // successor, the leftmost node of the right subtree, which
+                // has no left child and can be spliced out
+                let mut successor_parent = node_id;
+                let mut successor_id = right_id;
+                let successor_right = loop {
+                    let Some(successor) = self.tree.get_node(successor_id) else {
+                        return;
+                    };
+                    match successor.left() {
+                        Some(left_id) => {
+                            successor_parent = successor_id;
+                            successor_id = left_id;
                         }
-                        parent.remove_child(node_id);
+                        None => break successor.right(),
                     }
-                } else {
-                    // This is the root node, clear the root
-                    self.tree.set_root_id(None);
-                }
-                self.tree.remove_node(node_id);
-            }
-            (true, false) => {
-                // Node with only left child
-                let left_id = node_info.0.unwrap();
-                if let Some(parent_id) = parent_id {
-                    if let Some(parent) = self.tree.get_node_mut(parent_id) {
-                        if parent.left() == Some(node_id) {
-                            parent.set_left(left_id);
-                        } else if parent.right() == Some(node_id) {
-                            parent.set_right(left_id);
-                        }
-                    }
-                } else {
-                    // This is the root node
-                    self.tree.set_root_id(Some(left_id.into()));
-                }
-                if let Some(left) = self.tree.get_node_mut(left_id) {
-                    if let Some(parent_id) = parent_id {
-                        left.set_parent(parent_id);
-                    } else {
-                        left.remove_parent();
+                };
+                self.replace_child(Some(successor_parent), successor_id, successor_right);
+                self.drop_end(successor_id);
+                if let Some(successor) = self.tree.remove_node(successor_id) {
+                    if let Some(node) = self.tree.get_node_mut(node_id) {
+                        node.value = successor.value;
                     }
                 }
+            }
+            (child_id, None) | (None, child_id) => {
+                // Leaf or node with one child: move the child (if any) up
+                self.replace_child(parent_id, node_id, child_id);
+                self.drop_end(node_id);
                 self.tree.remove_node(node_id);
             }
-            (false, true) => {
-                // Node with only right child
-                let right_id = node_info.1.unwrap();
-                if let Some(parent_id) = parent_id {
-                    if let Some(parent) = self.tree.get_node_mut(parent_id) {
-                        if parent.left() == Some(node_id) {
-                            parent.set_left(right_id);
-                        } else if parent.right() == Some(node_id) {
-                            parent.set_right(right_id);
-                        }
+        }
+        self.version += 1;
+    }
+
+    /// Forget the minimum or maximum if it is `id`, which has just been
+    /// unlinked, and find the new one with a spine walk
+    fn drop_end(&mut self, id: Number) {
+        let Some(mut ends) = self.ends else {
+            return;
+        };
+        if ends.head == Some(id) {
+            ends.head = self.tree.root_id().map(|root_id| self.find_min(root_id));
+        }
+        if ends.tail == Some(id) {
+            ends.tail = self.tree.root_id().map(|root_id| self.find_max(root_id));
+        }
+        self.ends = Some(ends);
+    }
+
+    /// Hang `new_id` below `parent_id` in place of `old_id`
+    ///
+    /// With no parent, `new_id` becomes the root. Keeps the left/right links,
+    /// the generic child list and the parent pointer of `new_id` in sync.
+    fn replace_child(&mut self, parent_id: Option<Number>, old_id: Number, new_id: Option<Number>) {
+        match parent_id {
+            Some(parent_id) => {
+                if let Some(parent) = self.tree.get_node_mut(parent_id) {
+                    let is_left = parent.left() == Some(old_id);
+                    parent.remove_child(old_id);
+                    match (new_id, is_left) {
+                        (Some(new_id), true) => parent.set_left(new_id),
+                        (Some(new_id), false) => parent.set_right(new_id),
+                        (None, true) => parent.clear_left(),
+                        (None, false) => parent.clear_right(),
                     }
-                } else {
-                    // This is the root node
-                    self.tree.set_root_id(Some(right_id.into()));
-                }
-                if let Some(right) = self.tree.get_node_mut(right_id) {
-                    if let Some(parent_id) = parent_id {
-                        right.set_parent(parent_id);
-                    } else {
-                        right.remove_parent();
+                    if let Some(new_id) = new_id {
+                        parent.add_child(new_id);
                     }
                 }
-                self.tree.remove_node(node_id);
             }
-            (true, true) => {
-                // Node with two children
-                let right_id = node_info.1.unwrap();
-                let successor_id = self.find_min(right_id);
-                if let Some(successor) = self.tree.get_node(successor_id) {
-                    let successor_value = successor.value.clone();
-                    self.delete_node(successor_id);
-                    if let Some(node) = self.tree.get_node_mut(node_id) {
-                        node.value = successor_value;
-                    }
-                }
+            None => self.tree.set_root_id(new_id.map(Into::into)),
+        }
+
+        if let Some(child) = new_id.and_then(|id| self.tree.get_node_mut(id)) {
+            match parent_id {
+                Some(parent_id) => child.set_parent(parent_id),
+                None => child.remove_parent(),
             }
         }
     }
 
-    fn find_min(&self, node_id: Number) -> Number {
-        if let Some(node) = self.tree.get_node(node_id) {
-            if let Some(left_id) = node.left() {
-                self.find_min(left_id)
-            } else {
-                node_id
-            }
-        } else {
-            node_id
+    fn find_min(&self, mut node_id: Number) -> Number {
+        while let Some(left_id) = self.tree.get_node(node_id).and_then(Node::left) {
+            node_id = left_id;
         }
+        node_id
     }
 
     /// Perform an inorder traversal of the BST
@@ -372,23 +513,122 @@ impl<T: Ord + Clone> BST<T> {
     /// assert_eq!(inorder, vec![3, 5, 7]);
     /// ```
     pub fn inorder(&self) -> Vec<&Node<T>> {
-        let mut result = Vec::new();
-        if let Some(root_id) = self.tree.root_id() {
-            self.inorder_recursive(root_id, &mut result);
+        // Successor to successor from the minimum. The walk climbs back up
+        // through parent links instead of keeping a stack of ancestors, so
+        // it needs no memory beyond the output, however deep the tree.
+        let mut result = Vec::with_capacity(self.tree.size());
+        let mut current = self
+            .tree
+            .root_id()
+            .and_then(|root_id| self.tree.get_node(self.find_min(root_id)));
+
+        while let Some(node) = current {
+            result.push(node);
+            current = self.next_inorder(node);
         }
+
         result
     }
 
-    fn inorder_recursive<'a>(&'a self, node_id: Number, result: &mut Vec<&'a Node<T>>) {
-        if let Some(node) = self.tree.get_node(node_id) {
-            if let Some(left_id) = node.left() {
-                self.inorder_recursive(left_id, result);
+    /// The node that follows `node` in sorted order, if any
+    fn next_inorder(&self, node: &Node<T>) -> Option<&Node<T>> {
+        if let Some(right_id) = node.right() {
+            return self.tree.get_node(self.find_min(right_id));
+        }
+
+        // No right subtree: the successor is the first ancestor reached
+        // from its left side
+        let mut child = node;
+        loop {
+            let parent = self.tree.get_node(child.parent()?)?;
+            if parent.left() == Some(child.id) {
+                return Some(parent);
             }
-            result.push(node);
-            if let Some(right_id) = node.right() {
-                self.inorder_recursive(right_id, result);
+            child = parent;
+        }
+    }
+
+    /// Perform a boundary traversal of the BST
+    ///
+    /// Returns the root, then the left boundary top-down, then all leaves
+    /// from left to right, then the right boundary bottom-up. The left
+    /// boundary follows left children, taking the right child only where
+    /// there is no left one, and the right boundary mirrors it; neither
+    /// repeats the leaves.
+    ///
+    /// The traversal is a single walk that classifies every node on the
+    /// way down. Its result is cached until the tree changes, so repeated
+    /// calls on an unchanged tree only look the nodes up again.
+    ///
+    /// # Examples
+    ///
+    /// ```
+    /// use jangal::BST;
+    ///
+    /// let bst: BST<i32> = (1..=7).collect();
+    /// //       4
+    /// //     /   \
+    /// //    2     6
+    /// //   / \   / \
+    /// //  1   3 5   7
+    /// let boundary: Vec<i32> = bst.boundary_traversal().iter().map(|n| n.value).collect();
+    /// assert_eq!(boundary, vec![4, 2, 1, 3, 5, 7, 6]);
+    /// ```
+    pub fn boundary_traversal(&self) -> Vec<&Node<T>> {
+        let mut cache = self
+            .boundary_cache
+            .lock()
+            .unwrap_or_else(PoisonError::into_inner);
+        let ids = match &*cache {
+            Some((version, ids)) if *version == self.version => ids,
+            _ => &cache.insert((self.version, self.boundary_ids())).1,
+        };
+        ids.iter()
+            .filter_map(|&id| self.tree.get_node(id))
+            .collect()
+    }
+
+    fn boundary_ids(&self) -> Vec<Number> {
+        let mut result = Vec::new();
+        let mut right_edge = Vec::new();
+        let mut stack: Vec<(Number, Boundary)> = self
+            .tree
+            .root_id()
+            .map(|root_id| (root_id, Boundary::Root))
+            .into_iter()
+            .collect();
+
+        // Preorder, left to right: left edge nodes come out top-down and
+        // before any leaf, leaves come out in order, and right edge nodes
+        // are set aside to be appended bottom-up at the end
+        while let Some((node_id, position)) = stack.pop() {
+            let Some(node) = self.tree.get_node(node_id) else {
+                continue;
+            };
+            let (left, right) = (node.left(), node.right());
+
+            match position {
+                Boundary::Root => result.push(node_id),
+                _ if left.is_none() && right.is_none() => result.push(node_id),
+                Boundary::LeftEdge => result.push(node_id),
+                Boundary::RightEdge => right_edge.push(node_id),
+                Boundary::Interior => {}
             }
+
+            let (left_position, right_position) = match position {
+                Boundary::Root => (Boundary::LeftEdge, Boundary::RightEdge),
+                Boundary::LeftEdge if left.is_some() => (Boundary::LeftEdge, Boundary::Interior),
+                Boundary::LeftEdge => (Boundary::Interior, Boundary::LeftEdge),
+                Boundary::RightEdge if right.is_some() => (Boundary::Interior, Boundary::RightEdge),
+                Boundary::RightEdge => (Boundary::RightEdge, Boundary::Interior),
+                Boundary::Interior => (Boundary::Interior, Boundary::Interior),
+            };
+            stack.extend(right.map(|right_id| (right_id, right_position)));
+            stack.extend(left.map(|left_id| (left_id, left_position)));
         }
+
+        result.extend(right_edge.into_iter().rev());
+        result
     }
 
     /// Get the minimum element in the BST
@@ -406,6 +646,12 @@ impl<T: Ord + Clone> BST<T> {
     /// assert_eq!(bst.min(), Some(&3));
     /// ```
     pub fn min(&self) -> Option<&T> {
+        if let Some(ends) = &self.ends {
+            return ends
+                .head
+                .and_then(|id| self.tree.get_node(id))
+                .map(|n| &n.value);
+        }
         if let Some(root_id) = self.tree.root_id() {
             let min_id = self.find_min(root_id);
             self.tree.get_node(min_id).map(|n| &n.value)
@@ -429,6 +675,12 @@ impl<T: Ord + Clone> BST<T> {
     /// assert_eq!(bst.max(), Some(&7));
     /// ```
     pub fn max(&self) -> Option<&T> {
+        if let Some(ends) = &self.ends {
+            return ends
+                .tail
+                .and_then(|id| self.tree.get_node(id))
+                .map(|n| &n.value);
+        }
         if let Some(root_id) = self.tree.root_id() {
             let max_id = self.find_max(root_id);
             self.tree.get_node(max_id).map(|n| &n.value)
@@ -437,16 +689,11 @@ impl<T: Ord + Clone> BST<T> {
         }
     }
 
-    fn find_max(&self, node_id: Number) -> Number {
-        if let Some(node) = self.tree.get_node(node_id) {
-            if let Some(right_id) = node.right() {
-                self.find_max(right_id)
-            } else {
-                node_id
-            }
-        } else {
-            node_id
+    fn find_max(&self, mut node_id: Number) -> Number {
+        while let Some(right_id) = self.tree.get_node(node_id).and_then(Node::right) {
+            node_id = right_id;
         }
+        node_id
     }
 
     /// Check if the BST contains a given element
@@ -504,31 +751,24 @@ impl<T: Ord + Clone> BST<T> {
     /// assert_eq!(bst.height(), 2);
     /// ```
     pub fn height(&self) -> usize {
-        if let Some(root_id) = self.tree.root_id() {
-            self.bst_height_recursive(root_id)
-        } else {
-            0
+        // Depth-first walk carrying the number of nodes on the path so far
+        let mut height = 0;
+        let mut stack: Vec<(Number, usize)> = self
+            .tree
+            .root_id()
+            .map(|root_id| (root_id, 1))
+            .into_iter()
+            .collect();
+
+        while let Some((node_id, level)) = stack.pop() {
+            if let Some(node) = self.tree.get_node(node_id) {
+                height = height.max(level);
+                stack.extend(node.left().map(|left_id| (left_id, level + 1)));
+                stack.extend(node.right().map(|right_id| (right_id, level + 1)));
+            }
         }
-    }
-
-    fn bst_height_recursive(&self, node_id: Number) -> usize {
-        if let Some(node) = self.tree.get_node(node_id) {
-            let left_height = if let Some(left_id) = node.left() {
-                self.bst_height_recursive(left_id)
-            } else {
-                0
-            };
-
-            let right_height = if let Some(right_id) = node.right() {
-                self.bst_height_recursive(right_id)
-            } else {
-                0
-            };
 
-            1 + left_height.max(right_height)
-        } else {
-            0
-        }
+        height
     }
 
     /// Returns the depth of a node in the tree
@@ -673,6 +913,8 @@ impl<T: Ord + Clone> BST<T> {
     /// }
     /// ```
     pub fn get_node_mut(&mut self, id: Number) -> Option<&mut Node<T>> {
+        self.version += 1;
+        self.ends = None;
         self.tree.get_node_mut(id)
     }
 
@@ -734,6 +976,85 @@ impl<T: Ord + Clone> Default for BST<T> {
     }
 }
 
+impl<T: Ord + Clone> Clone for BST<T> {
+    /// Copy the tree, keeping its node ids and any cached boundary traversal
+    ///
+    /// # Examples
+    ///
+    /// ```
+    /// use jangal::BST;
+    ///
+    /// let original: BST<i32> = (1..=7).collect();
+    /// let mut copy = original.clone();
+    /// copy.delete(&4);
+    ///
+    /// assert_eq!(original.size(), 7);
+    /// assert_eq!(copy.size(), 6);
+    /// assert!(original.search(&4).is_some());
+    /// ```
+    fn clone(&self) -> Self {
+        let boundary_cache = self
+            .boundary_cache
+            .lock()
+            .unwrap_or_else(PoisonError::into_inner)
+            .clone();
+        Self {
+            tree: self.tree.clone(),
+            version: self.version,
+            boundary_cache: Mutex::new(boundary_cache),
+            ends: self.ends,
+        }
+    }
+}
+
+impl<T: Ord + Clone> FromIterator<T> for BST<T> {
+    /// Build a height-balanced BST from a collection of elements
+    ///
+    /// The elements are sorted and deduplicated once, then the tree is built
+    /// by taking medians (see [`BST::bulk_insert`]). This is O(n log n)
+    /// overall, where inserting one by one costs O(n^2) on already sorted
+    /// input and leaves a list-shaped tree behind.
+    ///
+    /// # Examples
+    ///
+    /// ```
+    /// use jangal::BST;
+    ///
+    /// let bst: BST<i32> = (1..=7).collect();
+    /// assert_eq!(bst.size(), 7);
+    /// assert_eq!(bst.height(), 3);
+    ///
+    /// // Duplicates are dropped, like with `insert`
+    /// let bst: BST<i32> = vec![5, 3, 3, 8].into_iter().collect();
+    /// assert_eq!(bst.size(), 3);
+    /// ```
+    fn from_iter<I: IntoIterator<Item = T>>(iter: I) -> Self {
+        let mut bst = Self::new();
+        bst.bulk_insert(iter);
+        bst
+    }
+}
+
+impl<T: Ord + Clone> Extend<T> for BST<T> {
+    /// Insert all elements of a collection, like [`BST::bulk_insert`]
+    ///
+    /// # Examples
+    ///
+    /// ```
+    /// use jangal::BST;
+    ///
+    /// let mut bst: BST<i32> = (1..=3).collect();
+    /// bst.extend(vec![10, 4, 2]);
+    /// assert_eq!(bst.size(), 5);
+    /// ```
+    fn extend<I: IntoIterator<Item = T>>(&mut self, iter: I) {
+        self.bulk_insert(iter);
+    }
+}
+
+/// Universes up to this size are stored as a single `u64` bitset
+const WORD_BITS: usize = u64::BITS as usize;
+
 /// A van Emde Boas tree implementation
 ///
 /// This vEB tree provides efficient operations on integers from 0 to u-1
@@ -764,6 +1085,9 @@ pub struct vEB {
     summary: Option<Box<vEB>>,
     clusters: Vec<Option<vEB>>,
     element_count: usize, // Track actual element count
+    shift: u32,           // log2 of the cluster size
+    mask: usize,          // Selects the low-order (in-cluster) bits
+    bits: u64,            // Members of a word-sized universe, one bit each
 }
 
 impl vEB {
@@ -790,6 +1114,14 @@ impl vEB {
             panic!("Universe size must be a power of 2");
         }
 
+        // For van Emde Boas, we need to split the universe properly
+        // If u = 2^2^k, then we want sqrt(u) = 2^(2^(k-1))
+        // For other powers of 2, we need to find the closest power of 2
+        let log_u = u.ilog2() as usize;
+        let upper_sqrt = 1 << log_u.div_ceil(2); // Upper square root
+        let lower_sqrt = u / upper_sqrt; // Lower square root
+        let shift = lower_sqrt.trailing_zeros();
+
         let mut veb = Self {
             tree: Tree::new(),
             universe_size: u,
@@ -798,21 +1130,16 @@ impl vEB {
             summary: None,
             clusters: Vec::new(),
             element_count: 0,
+            shift,
+            mask: lower_sqrt - 1,
+            bits: 0,
         };
 
-        if u > 2 {
-            // For van Emde Boas, we need to split the universe properly
-            // If u = 2^2^k, then we want sqrt(u) = 2^(2^(k-1))
-            // For other powers of 2, we need to find the closest power of 2
-            let log_u = u.ilog2() as usize;
-            let upper_sqrt = 1 << log_u.div_ceil(2); // Upper square root
-            let lower_sqrt = u / upper_sqrt; // Lower square root
-
-            veb.summary = Some(Box::new(vEB::new(upper_sqrt)));
+        // Word-sized universes live entirely in `bits`. Larger ones get
+        // their summary and each cluster on the first insert that needs
+        // them, so a sparse tree only pays for the clusters it uses.
+        if u > WORD_BITS {
             veb.clusters = vec![None; upper_sqrt];
-            for i in 0..upper_sqrt {
-                veb.clusters[i] = Some(vEB::new(lower_sqrt));
-            }
         }
 
         veb
@@ -896,43 +1223,52 @@ impl vEB {
             );
         }
 
-        if self.min.is_none() {
+        // Duplicates are ignored, which keeps the element count exact
+        if !self.contains(&x) {
+            self.insert_new(x);
+        }
+    }
+
+    /// Insert an element that is known not to be in the tree
+    ///
+    /// As in the textbook vEB tree, the minimum lives only in `min` and is
+    /// never stored in a cluster. That invariant is what lets `delete` find
+    /// the next minimum by pulling it up from the first non-empty cluster.
+    fn insert_new(&mut self, mut x: usize) {
+        self.element_count += 1;
+
+        if self.is_word() {
+            self.bits |= 1 << x;
+            self.sync_word_bounds();
+            return;
+        }
+
+        let Some(min) = self.min else {
             self.min = Some(x);
             self.max = Some(x);
-            self.element_count = 1;
-        } else {
-            if x < self.min.unwrap() {
-                let old_min = self.min.unwrap();
-                self.min = Some(x);
-                if self.universe_size > 2 {
-                    self.insert_recursive(old_min);
-                }
-            }
-            if x > self.max.unwrap() {
-                self.max = Some(x);
-            }
-            if self.universe_size > 2 {
-                self.insert_recursive(x);
-            }
-            self.element_count += 1;
+            return;
+        };
+
+        if x < min {
+            // x becomes the new min and the old min moves into a cluster
+            self.min = Some(x);
+            x = min;
         }
-    }
 
-    fn insert_recursive(&mut self, x: usize) {
-        let i = self.high(x);
-        let j = self.low(x);
+        let high_x = self.high(x);
+        let low_x = self.low(x);
+        let (cluster_size, num_clusters) = (self.cluster_size(), self.clusters.len());
+        let cluster = self.clusters[high_x].get_or_insert_with(|| vEB::new(cluster_size));
+        if cluster.min.is_none() {
+            self.summary
+                .get_or_insert_with(|| Box::new(vEB::new(num_clusters)))
+                .insert_new(high_x);
+        }
+        // Constant time when the cluster was empty
+        cluster.insert_new(low_x);
 
-        if let Some(cluster) = &mut self.clusters[i] {
-            if cluster.min.is_none() {
-                if let Some(summary) = &mut self.summary {
-                    summary.insert(i);
-                }
-                cluster.min = Some(j);
-                cluster.max = Some(j);
-                cluster.element_count = 1;
-            } else {
-                cluster.insert(j);
-            }
+        if Some(x) > self.max {
+            self.max = Some(x);
         }
     }
 
@@ -966,9 +1302,8 @@ impl vEB {
             return Some(f64::NAN); // Return marker value since we're not using the tree structure
         }
 
-        // Base case: universe size 2
-        if self.universe_size == 2 {
-            return None;
+        if self.is_word() {
+            return ((self.bits >> *x) & 1 == 1).then_some(0.0);
         }
 
         // Search recursively in clusters
@@ -1006,88 +1341,65 @@ impl vEB {
     /// assert!(!veb.contains(&3));
     /// ```
     pub fn delete(&mut self, x: &usize) {
-        if *x >= self.universe_size {
+        // Deleting an element that is not there is a no-op
+        if self.contains(x) {
+            self.delete_present(*x);
+        }
+    }
+
+    /// Delete an element that is known to be in the tree
+    fn delete_present(&mut self, mut x: usize) {
+        self.element_count -= 1;
+
+        if self.is_word() {
+            self.bits &= !(1 << x);
+            self.sync_word_bounds();
             return;
         }
 
-        if self.min == Some(*x) && self.max == Some(*x) {
+        if self.min == self.max {
             self.min = None;
             self.max = None;
-            self.element_count = 0;
-        } else if self.universe_size == 2 {
-            if *x == 0 {
-                self.min = Some(1);
-            } else {
-                self.min = Some(0);
-            }
-            self.max = self.min;
-            self.element_count = 1;
-        } else {
-            if *x == self.min.unwrap() {
-                let first_cluster = self.summary.as_ref().unwrap().min.unwrap();
-                let new_min_low = self.clusters[first_cluster].as_ref().unwrap().min.unwrap();
-                let new_min = self.index(first_cluster, new_min_low);
-                self.min = Some(new_min);
-
-                // Delete the new min from its cluster
-                self.clusters[first_cluster]
-                    .as_mut()
-                    .unwrap()
-                    .delete(&new_min_low);
-
-                // If cluster is now empty, remove it from summary
-                if self.clusters[first_cluster].as_ref().unwrap().min.is_none() {
-                    self.summary.as_mut().unwrap().delete(&first_cluster);
-
-                    // Update max if needed
-                    if new_min == self.max.unwrap() {
-                        let summary_max = self.summary.as_ref().unwrap().max;
-                        if let Some(summary_max_val) = summary_max {
-                            let cluster_max = self.clusters[summary_max_val]
-                                .as_ref()
-                                .unwrap()
-                                .max
-                                .unwrap();
-                            self.max = Some(self.index(summary_max_val, cluster_max));
-                        } else {
-                            self.max = self.min;
-                        }
-                    }
-                }
-            } else {
-                let high_x = self.high(*x);
-                let low_x = self.low(*x);
-
-                // Delete from cluster
-                self.clusters[high_x].as_mut().unwrap().delete(&low_x);
-
-                // If cluster is now empty, remove it from summary
-                if self.clusters[high_x].as_ref().unwrap().min.is_none() {
-                    self.summary.as_mut().unwrap().delete(&high_x);
-
-                    // Update max if needed
-                    if *x == self.max.unwrap() {
-                        let summary_max = self.summary.as_ref().unwrap().max;
-                        if let Some(summary_max_val) = summary_max {
-                            let cluster_max = self.clusters[summary_max_val]
-                                .as_ref()
-                                .unwrap()
-                                .max
-                                .unwrap();
-                            self.max = Some(self.index(summary_max_val, cluster_max));
-                        } else {
-                            self.max = self.min;
-                        }
-                    }
-                } else if *x == self.max.unwrap() {
-                    let cluster_max = self.clusters[high_x].as_ref().unwrap().max.unwrap();
-                    self.max = Some(self.index(high_x, cluster_max));
+            return;
+        }
+
+        if Some(x) == self.min {
+            // The min is not stored in any cluster: promote the smallest
+            // clustered element to min and delete it from its cluster instead
+            let first_cluster = self.summary.as_ref().unwrap().min.unwrap();
+            let first_low = self.clusters[first_cluster].as_ref().unwrap().min.unwrap();
+            x = self.index(first_cluster, first_low);
+            self.min = Some(x);
+        }
+
+        let high_x = self.high(x);
+        let low_x = self.low(x);
+        let cluster = self.clusters[high_x].as_mut().unwrap();
+        cluster.delete_present(low_x);
+        let cluster_max = cluster.max;
+
+        match cluster_max {
+            // If cluster is now empty, remove it from summary
+            None => {
+                self.summary.as_mut().unwrap().delete_present(high_x);
+                if Some(x) == self.max {
+                    self.max = self.clustered_max().or(self.min);
                 }
             }
-            self.element_count -= 1;
+            Some(cluster_max) if Some(x) == self.max => {
+                self.max = Some(self.index(high_x, cluster_max));
+            }
+            Some(_) => {}
         }
     }
 
+    /// Largest element stored in the clusters, found through the summary
+    fn clustered_max(&self) -> Option<usize> {
+        let high = self.summary.as_ref()?.max?;
+        let low = self.clusters[high].as_ref()?.max?;
+        Some(self.index(high, low))
+    }
+
     /// Check if the vEB tree contains a given element
     ///
     /// # Arguments
@@ -1112,19 +1424,23 @@ impl vEB {
             return false;
         }
 
-        if (self.min.is_some() && x == self.min.as_ref().unwrap())
-            || (self.max.is_some() && x == self.max.as_ref().unwrap())
-        {
-            true
-        } else if self.universe_size == 2 {
-            false
-        } else {
-            let high_x = self.high(*x);
-            let low_x = self.low(*x);
-            if let Some(cluster) = &self.clusters[high_x] {
-                return cluster.contains(&low_x);
+        // Walk down the clusters in a loop rather than recursing per level
+        let mut veb = self;
+        let mut x = *x;
+        loop {
+            if veb.is_word() {
+                return veb.bits >> x & 1 == 1;
+            }
+            if veb.min == Some(x) || veb.max == Some(x) {
+                return true;
+            }
+            match &veb.clusters[veb.high(x)] {
+                Some(cluster) => {
+                    x = veb.low(x);
+                    veb = cluster;
+                }
+                None => return false,
             }
-            false
         }
     }
 
@@ -1224,33 +1540,29 @@ impl vEB {
             return None;
         }
 
-        if self.universe_size == 2 {
-            if *x == 0 && self.max == Some(1) {
-                return Some(1);
-            } else {
-                return None;
-            }
+        if self.is_word() {
+            // Keep only the members above x; the lowest of them is the answer
+            let above = self.bits & u64::MAX.checked_shl(*x as u32 + 1).unwrap_or(0);
+            return (above != 0).then(|| above.trailing_zeros() as usize);
         } else if self.min.is_some() && *x < self.min.unwrap() {
             return self.min;
         } else {
             let high_x = self.high(*x);
             let low_x = self.low(*x);
+            let clusters = &self.clusters;
 
-            if let Some(cluster) = &self.clusters[high_x] {
-                let max_low = cluster.max;
-                if max_low.is_some() && low_x < max_low.unwrap() {
-                    let offset = cluster.successor(&low_x);
-                    if let Some(offset_val) = offset {
-                        return Some(self.index(high_x, offset_val));
+            if let Some(cluster) = &clusters[high_x] {
+                if cluster.max.is_some_and(|max_low| low_x < max_low) {
+                    if let Some(offset) = cluster.successor(&low_x) {
+                        return Some(self.index(high_x, offset));
                     }
                 }
             }
 
-            let succ_cluster = self.summary.as_ref().unwrap().successor(&high_x);
-            if let Some(succ_cluster_val) = succ_cluster {
-                let offset = self.clusters[succ_cluster_val].as_ref().unwrap().min;
-                if let Some(offset_val) = offset {
-                    return Some(self.index(succ_cluster_val, offset_val));
+            let summary = self.summary.as_ref()?;
+            if let Some(succ_cluster) = summary.successor(&high_x) {
+                if let Some(offset) = clusters[succ_cluster].as_ref().unwrap().min {
+                    return Some(self.index(succ_cluster, offset));
                 }
             }
         }
@@ -1281,33 +1593,32 @@ impl vEB {
             return None;
         }
 
-        if self.universe_size == 2 {
-            if *x == 1 && self.min == Some(0) {
-                return Some(0);
-            } else {
-                return None;
-            }
+        if self.is_word() {
+            // Keep only the members below x; the highest of them is the answer
+            let below = self.bits & ((1 << *x) - 1);
+            return (below != 0).then(|| (u64::BITS - 1 - below.leading_zeros()) as usize);
         } else if self.max.is_some() && *x > self.max.unwrap() {
             return self.max;
         } else {
             let high_x = self.high(*x);
             let low_x = self.low(*x);
+            let clusters = &self.clusters;
 
-            if let Some(cluster) = &self.clusters[high_x] {
-                let min_low = cluster.min;
-                if min_low.is_some() && low_x > min_low.unwrap() {
-                    let offset = cluster.predecessor(&low_x);
-                    if let Some(offset_val) = offset {
-                        return Some(self.index(high_x, offset_val));
+            if let Some(cluster) = &clusters[high_x] {
+                if cluster.min.is_some_and(|min_low| low_x > min_low) {
+                    if let Some(offset) = cluster.predecessor(&low_x) {
+                        return Some(self.index(high_x, offset));
                     }
                 }
             }
 
-            let pred_cluster = self.summary.as_ref().unwrap().predecessor(&high_x);
-            if let Some(pred_cluster_val) = pred_cluster {
-                let offset = self.clusters[pred_cluster_val].as_ref().unwrap().max;
-                if let Some(offset_val) = offset {
-                    return Some(self.index(pred_cluster_val, offset_val));
+            let pred_cluster = self
+                .summary
+                .as_ref()
+                .and_then(|summary| summary.predecessor(&high_x));
+            if let Some(pred_cluster) = pred_cluster {
+                if let Some(offset) = clusters[pred_cluster].as_ref().unwrap().max {
+                    return Some(self.index(pred_cluster, offset));
                 }
             } else if self.min.is_some() && *x > self.min.unwrap() {
                 return self.min;
@@ -1362,29 +1673,46 @@ impl vEB {
         self.element_count == 0
     }
 
+    /// Whether the whole universe fits in `bits`, with no clusters below
+    fn is_word(&self) -> bool {
+        self.universe_size <= WORD_BITS
+    }
+
+    /// Recompute `min` and `max` of a word-sized tree from its bits
+    ///
+    /// Parents read `min` and `max` of their clusters directly, so these
+    /// have to stay in step with `bits`.
+    fn sync_word_bounds(&mut self) {
+        let nonempty = self.bits != 0;
+        self.min = nonempty.then(|| self.bits.trailing_zeros() as usize);
+        self.max = nonempty.then(|| (u64::BITS - 1 - self.bits.leading_zeros()) as usize);
+    }
+
+    /// Get the size of each cluster (the lower square root of the universe)
     fn cluster_size(&self) -> usize {
-        // For van Emde Boas, we need to split the universe properly
-        // If u = 2^2^k, then we want sqrt(u) = 2^(2^(k-1))
-        // For other powers of 2, we need to find the closest power of 2
-        let log_u = self.universe_size.ilog2() as usize;
-        let upper_sqrt = 1 << log_u.div_ceil(2); // Upper square root
-                                                 // Lower square root
-        self.universe_size / upper_sqrt
+        1 << self.shift
     }
 
+    // The universe size is a power of 2, so the cluster size is too and
+    // splitting x into (cluster, offset) is a shift and a mask rather than
+    // a division and a modulo.
+
     /// Get the high-order bits (cluster number) of x
+    #[inline]
     fn high(&self, x: usize) -> usize {
-        x / self.cluster_size()
+        x >> self.shift
     }
 
     /// Get the low-order bits (position within cluster) of x
+    #[inline]
     fn low(&self, x: usize) -> usize {
-        x % self.cluster_size()
+        x & self.mask
     }
 
     /// Combine high and low bits to form the original value
+    #[inline]
     fn index(&self, high: usize, low: usize) -> usize {
-        high * self.cluster_size() + low
+        (high << self.shift) | low
     }
 
     /// Get the root node ID
@@ -1458,22 +1786,34 @@ impl vEB {
 #[cfg(test)]
 mod tests {
     use super::*;
+    use std::sync::OnceLock;
 
-    #[test]
-    fn test_bst_core_operations() {
+    /// Build a BST by inserting the elements one by one, in order
+    fn insert_in_order<I: IntoIterator<Item = i32>>(elements: I) -> BST<i32> {
         let mut bst = BST::new();
+        for element in elements {
+            bst.insert(element);
+        }
+        bst
+    }
+
+    /// The 5-3-7-1-9 tree many tests start from, built once and shared
+    ///
+    /// Tests that only read it borrow it; tests that change it take a clone.
+    fn sample_bst() -> &'static BST<i32> {
+        static SAMPLE: OnceLock<BST<i32>> = OnceLock::new();
+        SAMPLE.get_or_init(|| insert_in_order([5, 3, 7, 1, 9]))
+    }
 
+    #[test]
+    fn test_bst_core_operations() {
         // Test empty state
-        assert!(bst.is_empty());
-        assert_eq!(bst.size(), 0);
+        let empty: BST<i32> = BST::new();
+        assert!(empty.is_empty());
+        assert_eq!(empty.size(), 0);
 
         // Test insertion and basic properties
-        bst.insert(5);
-        bst.insert(3);
-        bst.insert(7);
-        bst.insert(1);
-        bst.insert(9);
-
+        let bst = sample_bst();
         assert_eq!(bst.size(), 5);
         assert!(!bst.is_empty());
         assert_eq!(bst.min(), Some(&1));
@@ -1492,30 +1832,108 @@ mod tests {
     }
 
     #[test]
-    fn test_bst_tree_access_methods() {
+    fn test_bst_inorder_degenerate_tree() {
+        // Sorted input produces a right-leaning chain as deep as the tree
         let mut bst = BST::new();
-        bst.insert(5);
-        bst.insert(3);
-        bst.insert(7);
+        for i in 0..2000 {
+            bst.insert(i);
+        }
+
+        let values: Vec<i32> = bst.inorder().iter().map(|node| node.value).collect();
+        assert_eq!(values, (0..2000).collect::<Vec<_>>());
+        assert_eq!(bst.min(), Some(&0));
+        assert_eq!(bst.max(), Some(&1999));
+        assert_eq!(bst.height(), 2000);
+
+        // Insert, search and delete walk the whole chain without recursing
+        assert!(bst.search(&1999).is_some());
+        assert!(bst.search(&2000).is_none());
+        assert!(!bst.insert(1999));
+        assert!(bst.insert(2000));
+        bst.delete(&1999);
+        assert!(bst.search(&1999).is_none());
+        assert_eq!(bst.max(), Some(&2000));
+    }
+
+    #[test]
+    fn test_bst_inorder_after_mixed_updates() {
+        use std::collections::BTreeSet;
+
+        // The walk climbs parent links, so they must survive every update
+        let mut bst: BST<i32> = (0..64).map(|i| i * 3).collect();
+        let mut expected: BTreeSet<i32> = (0..64).map(|i| i * 3).collect();
+        let mut state = 0x9e37_79b9_u64;
+        for _ in 0..500 {
+            state ^= state << 13;
+            state ^= state >> 7;
+            state ^= state << 17;
+            let x = (state % 200) as i32;
+            if state.is_multiple_of(3) {
+                bst.delete(&x);
+                expected.remove(&x);
+            } else {
+                bst.insert(x);
+                expected.insert(x);
+            }
+
+            let values: Vec<i32> = bst.inorder().iter().map(|node| node.value).collect();
+            assert!(values.iter().eq(expected.iter()));
+        }
+    }
+
+    #[test]
+    fn test_bst_ends_follow_updates() {
+        let values =
+            |bst: &BST<i32>| -> Vec<i32> { bst.inorder().iter().map(|n| n.value).collect() };
+
+        let mut bst: BST<i32> = (1..=7).collect();
+        bst.insert(0);
+        bst.insert(8);
+        bst.insert(4); // already present
+        assert_eq!((bst.min(), bst.max()), (Some(&0), Some(&8)));
+        bst.delete(&4); // two children: the successor's node drops out
+        bst.delete(&8);
+        bst.delete(&7);
+        assert_eq!(values(&bst), vec![0, 1, 2, 3, 5, 6]);
+        assert_eq!((bst.min(), bst.max()), (Some(&0), Some(&6)));
+
+        // A two-child delete whose successor is the maximum
+        let mut small: BST<i32> = [2, 1, 3].into_iter().collect();
+        small.delete(&2);
+        assert_eq!((small.min(), small.max()), (Some(&1), Some(&3)));
+
+        // Mutable access drops the ends; reads fall back to the spines and
+        // the next update finds them again
+        bst.as_tree_mut();
+        assert!(bst.ends.is_none());
+        assert_eq!(bst.max(), Some(&6));
+        bst.insert(9);
+        assert!(bst.ends.is_some());
+        assert_eq!((bst.min(), bst.max()), (Some(&0), Some(&9)));
+
+        for x in [0, 1, 2, 3, 5, 6, 9] {
+            bst.delete(&x);
+        }
+        let ends = bst.ends.unwrap();
+        assert!(ends.head.is_none() && ends.tail.is_none());
+        assert_eq!(bst.min(), None);
+    }
+
+    #[test]
+    fn test_bst_tree_access_methods() {
+        let mut bst = sample_bst().clone();
 
         let tree_ref = bst.as_tree();
-        assert_eq!(tree_ref.size(), 3);
+        assert_eq!(tree_ref.size(), 5);
         assert!(tree_ref.root_id().is_some());
 
         let tree_mut = bst.as_tree_mut();
-        assert_eq!(tree_mut.size(), 3);
+        assert_eq!(tree_mut.size(), 5);
     }
 
     #[test]
     fn test_bst_deletion_scenarios() {
-        let mut bst = BST::new();
-
-        // Build a balanced tree
-        bst.insert(5);
-        bst.insert(3);
-        bst.insert(7);
-        bst.insert(1);
-        bst.insert(9);
+        let mut bst = sample_bst().clone();
 
         // Test deletion of leaf node
         bst.delete(&1);
@@ -1535,6 +1953,40 @@ mod tests {
         // Verify remaining structure
         assert!(bst.search(&7).is_some());
         assert!(bst.search(&9).is_some());
+
+        // The shared tree is untouched
+        assert_eq!(sample_bst().size(), 5);
+        assert!(sample_bst().search(&5).is_some());
+    }
+
+    #[test]
+    fn test_bst_deletion_keeps_tree_links_consistent() {
+        let mut bst = BST::new();
+        for element in [5, 3, 8, 1, 7, 9, 6] {
+            bst.insert(element);
+        }
+
+        // One child (3 -> 1), two children (8), then the root
+        bst.delete(&3);
+        bst.delete(&8);
+        bst.delete(&5);
+
+        let values: Vec<i32> = bst.inorder().iter().map(|node| node.value).collect();
+        assert_eq!(values, vec![1, 6, 7, 9]);
+
+        // Generic tree views agree with the left/right structure
+        assert_eq!(bst.dfs().len(), 4);
+        assert_eq!(bst.num_leaves(), 2);
+        for node in bst.inorder() {
+            let mut expected: Vec<_> = node.left().into_iter().chain(node.right()).collect();
+            let mut children = node.children();
+            expected.sort_by(f64::total_cmp);
+            children.sort_by(f64::total_cmp);
+            assert_eq!(children, expected);
+            for child_id in children {
+                assert_eq!(bst.get_node(child_id).unwrap().parent(), Some(node.id));
+            }
+        }
     }
 
     #[test]
@@ -1562,15 +2014,114 @@ mod tests {
         }
     }
 
+    #[test]
+    fn test_bst_from_iterator_is_balanced() {
+        let bst: BST<i32> = (0..1023).collect();
+
+        assert_eq!(bst.size(), 1023);
+        assert_eq!(bst.height(), 10);
+        assert_eq!(
+            bst.root().and_then(|id| bst.get_node(id)).map(|n| n.value),
+            Some(511)
+        );
+        assert_eq!(bst.min(), Some(&0));
+        assert_eq!(bst.max(), Some(&1022));
+
+        let values: Vec<i32> = bst.inorder().iter().map(|node| node.value).collect();
+        assert_eq!(values, (0..1023).collect::<Vec<_>>());
+
+        // The result is an ordinary BST that keeps working after the build
+        let mut bst: BST<i32> = vec![9, 1, 5, 1, 7].into_iter().collect();
+        assert_eq!(bst.size(), 4);
+        bst.insert(3);
+        bst.delete(&5);
+        let values: Vec<i32> = bst.inorder().iter().map(|node| node.value).collect();
+        assert_eq!(values, vec![1, 3, 7, 9]);
+
+        let empty: BST<i32> = Vec::new().into_iter().collect();
+        assert!(empty.is_empty());
+        assert_eq!(empty.root(), None);
+    }
+
+    #[test]
+    fn test_bst_boundary_traversal() {
+        let boundary = |bst: &BST<i32>| -> Vec<i32> {
+            bst.boundary_traversal()
+                .iter()
+                .map(|node| node.value)
+                .collect()
+        };
+
+        let mut bst = BST::new();
+        assert!(boundary(&bst).is_empty());
+        bst.insert(1);
+        assert_eq!(boundary(&bst), vec![1]);
+
+        // Linear trees are all boundary
+        let left = insert_in_order([5, 4, 3, 2, 1]);
+        assert_eq!(boundary(&left), vec![5, 4, 3, 2, 1]);
+        let right = insert_in_order([1, 2, 3, 4, 5]);
+        assert_eq!(boundary(&right), vec![1, 5, 4, 3, 2]);
+
+        //          20
+        //        /    \
+        //       8      22
+        //      / \       \
+        //     4   12      25
+        //        /  \
+        //       10   14
+        let mut bst = insert_in_order([20, 8, 22, 4, 12, 25, 10, 14]);
+        assert_eq!(boundary(&bst), vec![20, 8, 4, 10, 14, 25, 22]);
+        // Cached answer for an unchanged tree
+        assert_eq!(boundary(&bst), vec![20, 8, 4, 10, 14, 25, 22]);
+
+        // The left boundary turns right where there is no left child
+        bst.delete(&4);
+        assert_eq!(boundary(&bst), vec![20, 8, 12, 10, 14, 25, 22]);
+        bst.insert(23);
+        assert_eq!(boundary(&bst), vec![20, 8, 12, 10, 14, 23, 25, 22]);
+        // A duplicate insert leaves the cached answer valid
+        let version = bst.version;
+        assert!(!bst.insert(23));
+        assert_eq!(bst.version, version);
+    }
+
+    #[test]
+    fn test_bst_bulk_insert_into_existing_tree() {
+        let mut bst = BST::new();
+        bst.insert(500);
+
+        // Sorted input inserted one by one would hang a 1000-deep chain off
+        // the root; medians first keeps it logarithmic
+        assert_eq!(bst.bulk_insert(0..1000), 999);
+        assert_eq!(bst.size(), 1000);
+        assert!(bst.height() <= 12);
+
+        let values: Vec<i32> = bst.inorder().iter().map(|node| node.value).collect();
+        assert_eq!(values, (0..1000).collect::<Vec<_>>());
+
+        bst.extend(vec![2000, 1500, 2000]);
+        assert_eq!(bst.size(), 1002);
+        assert_eq!(bst.max(), Some(&2000));
+        assert_eq!(bst.bulk_insert(Vec::new()), 0);
+    }
+
     #[test]
     fn test_bst_edge_cases() {
         let mut bst = BST::new();
 
         // Test duplicate handling
-        bst.insert(5);
-        bst.insert(5);
+        assert!(bst.insert(5));
+        assert!(!bst.insert(5));
         assert_eq!(bst.size(), 1);
 
+        // Duplicates deeper in the tree are reported too
+        assert!(bst.insert(3));
+        assert!(bst.insert(4));
+        assert!(!bst.insert(4));
+        bst.delete(&3);
+        bst.delete(&4);
+
         // Test single node operations
         assert_eq!(bst.min(), Some(&5));
         assert_eq!(bst.max(), Some(&5));
@@ -1753,6 +2304,111 @@ mod tests {
         assert_eq!(veb.predecessor(&7), Some(5));
     }
 
+    #[test]
+    fn test_veb_matches_btreeset() {
+        use std::collections::BTreeSet;
+
+        // Deterministic pseudo-random operations, checked against BTreeSet
+        let mut state: u64 = 0x2545_f491_4f6c_dd1d;
+        let mut next = move |bound: usize| {
+            state ^= state << 13;
+            state ^= state >> 7;
+            state ^= state << 17;
+            (state % bound as u64) as usize
+        };
+
+        for universe in [2, 4, 8, 32, 64, 128, 256, 4096] {
+            let mut veb = vEB::new(universe);
+            let mut expected = BTreeSet::new();
+
+            for _ in 0..2000 {
+                let x = next(universe);
+                if next(3) == 0 {
+                    veb.delete(&x);
+                    expected.remove(&x);
+                } else {
+                    veb.insert(x);
+                    expected.insert(x);
+                }
+
+                assert_eq!(veb.size(), expected.len());
+                assert_eq!(veb.min(), expected.first().copied());
+                assert_eq!(veb.max(), expected.last().copied());
+
+                let y = next(universe);
+                assert_eq!(veb.contains(&y), expected.contains(&y));
+                assert_eq!(veb.search(&y).is_some(), expected.contains(&y));
+                assert_eq!(veb.successor(&y), expected.range(y + 1..).next().copied());
+                assert_eq!(
+                    veb.predecessor(&y),
+                    expected.range(..y).next_back().copied()
+                );
+            }
+        }
+    }
+
+    #[test]
+    fn test_veb_word_universe_uses_bitset() {
+        let mut veb = vEB::new(64);
+        assert!(veb.summary.is_none() && veb.clusters.is_empty());
+
+        for x in [0, 17, 63] {
+            veb.insert(x);
+        }
+        assert_eq!(veb.bits, 1 | 1 << 17 | 1 << 63);
+        assert_eq!(veb.successor(&17), Some(63));
+        assert_eq!(veb.successor(&63), None);
+        assert_eq!(veb.predecessor(&0), None);
+
+        veb.delete(&63);
+        assert_eq!(veb.max(), Some(17));
+
+        // Members between min and max are found in the bitset
+        let mut small = vEB::new(8);
+        for x in [3, 5, 7] {
+            small.insert(x);
+        }
+        assert!(small.search(&5).is_some());
+        assert!(small.search(&4).is_none());
+        assert!(veb.search(&17).is_some() && veb.search(&63).is_none());
+
+        // Larger universes recurse down to bitset clusters
+        let mut wide = vEB::new(4096);
+        assert_eq!(wide.clusters.len(), 64);
+        for x in [1, 5, 700, 4095] {
+            wide.insert(x);
+        }
+        assert!(wide.clusters.iter().flatten().all(vEB::is_word));
+    }
+
+    #[test]
+    fn test_veb_allocates_clusters_on_demand() {
+        let mut veb = vEB::new(1 << 16);
+        assert!(veb.summary.is_none());
+        assert!(veb.clusters.iter().all(Option::is_none));
+
+        // The minimum is kept out of the clusters, so the first insert
+        // allocates nothing
+        veb.insert(4464);
+        assert!(veb.summary.is_none());
+        assert_eq!(veb.successor(&0), Some(4464));
+        assert_eq!(veb.predecessor(&4464), None);
+        assert_eq!(veb.successor(&4464), None);
+
+        veb.insert(9);
+        veb.insert(60_000);
+        assert_eq!(veb.clusters.iter().flatten().count(), 2);
+        assert_eq!(veb.successor(&9), Some(4464));
+        assert_eq!(veb.predecessor(&60_000), Some(4464));
+
+        // Emptied clusters stay allocated for reuse
+        veb.delete(&4464);
+        veb.delete(&60_000);
+        assert_eq!(veb.clusters.iter().flatten().count(), 2);
+        assert_eq!(veb.successor(&9), None);
+        assert_eq!(veb.max(), Some(9));
+    }
+
     #[test]
     fn test_veb_cluster_size() {
         let mut veb = vEB::new(4);
@@ -1761,6 +2417,18 @@ mod tests {
         let num_clusters = veb.universe_size / veb.cluster_size();
         assert_eq!(num_clusters, 2);
 
+        // Splitting into (cluster, offset) must agree with division and
+        // round-trip through index, for even and odd powers of two
+        for (universe, cluster_size) in [(32, 4), (128, 8), (256, 16), (1 << 13, 64)] {
+            let wide = vEB::new(universe);
+            assert_eq!(wide.cluster_size(), cluster_size);
+            for x in 0..universe {
+                assert_eq!(wide.high(x), x / cluster_size);
+                assert_eq!(wide.low(x), x % cluster_size);
+                assert_eq!(wide.index(wide.high(x), wide.low(x)), x);
+            }
+        }
+
         veb.insert(0);
         assert_eq!(veb.size(), 1);
         assert_eq!(veb.minimum(), Some(0));